@@ -1,10 +1,15 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Form, Query, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Form, Query, BackgroundTasks, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from bson import Binary
 import os
+import asyncio
 import logging
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Literal, Dict, Any
@@ -12,21 +17,55 @@ import uuid
 from datetime import datetime, timedelta
 import jwt
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, VerificationError, InvalidHashError
 import base64
 import httpx
 import json
 import random
+import re
+import zlib
+import hashlib
+import orjson
+import redis.asyncio as aioredis
+import boto3
+
+# uvloop trims per-I/O syscall overhead; optional so dev on any platform works
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (explicit pool sizing; defaults stall under bursts).
+# Wire compression pays for itself on the base64-heavy documents; zlib is
+# the fallback when the server lacks zstd.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    minPoolSize=20,
+    maxPoolSize=200,
+    maxIdleTimeMS=60000,
+    serverSelectionTimeoutMS=5000,
+    compressors='zstd,zlib',
+    zlibCompressionLevel=3,
+    retryWrites=True,
+    w='majority'
+)
 db = client[os.environ['DB_NAME']]
 
+# Redis cache (cache-aside for hot auth lookups)
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+USER_CACHE_TTL_SECONDS = 60
+
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'seniorcare-secret-key-2024')
+# Pre-encoded once so token calls skip the per-call str.encode()
+_JWT_KEY = JWT_SECRET.encode()
 JWT_ALGORITHM = 'HS256'
 JWT_ACCESS_EXPIRATION_HOURS = 24
 JWT_REFRESH_EXPIRATION_DAYS = 30
@@ -34,16 +73,87 @@ JWT_REFRESH_EXPIRATION_DAYS = 30
 # Emergent LLM Key for AI features
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY', 'sk-emergent-17792Cd772a8bDa732')
 
+# Shared HTTP client: keep-alive pooling avoids a TCP+TLS handshake per call
+# http2 lets the AI and push calls multiplex one kept-alive connection
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+)
+
 # Background check expiration (6 months)
 BACKGROUND_CHECK_VALIDITY_DAYS = 180
 
-app = FastAPI(title="SeniorCare+ API", version="2.0.0", description="Premium caregiver marketplace")
+# Media object store: uploads go to S3 and only the URL is kept in Mongo.
+# When no bucket is configured (local dev) the base64 payload stays inline.
+MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', '')
+MEDIA_CDN_BASE = os.environ.get('MEDIA_CDN_BASE', f'https://{MEDIA_BUCKET}.s3.amazonaws.com')
+s3_client = boto3.client('s3') if MEDIA_BUCKET else None
+
+app = FastAPI(
+    title="SeniorCare+ API",
+    version="2.0.0",
+    description="Premium caregiver marketplace",
+    default_response_class=ORJSONResponse
+)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def new_id() -> str:
+    """Time-ordered UUIDv7 string (RFC 9562).
+
+    Random uuid4 ids scatter inserts across the id index; the 48-bit
+    millisecond prefix here keeps B-tree inserts append-mostly.
+    """
+    value = time.time_ns() // 1_000_000 << 80
+    value |= 0x7 << 76 | random.getrandbits(12) << 64
+    value |= 0x2 << 62 | random.getrandbits(62)
+    return str(uuid.UUID(int=value))
+
+async def store_media(b64_payload: Optional[str], content_type: str = 'image/jpeg') -> Optional[str]:
+    """Offload a base64 upload to the media bucket and return its URL.
+
+    Keys are content-addressed (sha256) so re-uploads of the same bytes
+    dedupe for free. Returns None when no bucket is configured so callers
+    can fall back to inline storage.
+    """
+    if not s3_client or not b64_payload:
+        return None
+    # Malformed payloads were accepted before the offload existed; fall
+    # back to inline storage instead of failing the upload
+    try:
+        data = base64.b64decode(b64_payload)
+    except (ValueError, TypeError):
+        return None
+    key = hashlib.sha256(data).hexdigest()
+    await asyncio.to_thread(
+        s3_client.put_object,
+        Bucket=MEDIA_BUCKET, Key=key, Body=data, ContentType=content_type
+    )
+    return f'{MEDIA_CDN_BASE}/{key}'
+
+def preview(text: str, limit: int) -> str:
+    """Truncate once for notification previews; slicing beats len() on long text"""
+    return text[:limit] + '…' if text[limit:limit + 1] else text
+
+# The loop only keeps weak refs to tasks, so fire-and-forget writes need
+# a strong ref until they finish — and a place to log their failures
+_background_tasks: set = set()
+
+def _background_task_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error(f"Background write failed: {task.exception()}")
+
+def fire_and_forget(coro) -> None:
+    """Run a write off the response path without losing it to the GC"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+
 # ============ MODELS ============
 
 class UserCreate(BaseModel):
@@ -184,6 +294,7 @@ class CareLogResponse(BaseModel):
     description: str
     vital_signs: Optional[Dict[str, Any]] = None
     photo_base64: Optional[str] = None
+    photo_url: Optional[str] = None
     created_at: datetime
 
 class EmergencyAlert(BaseModel):
@@ -247,74 +358,228 @@ class AcademyContent(BaseModel):
     content_body: Optional[str] = None
     created_at: datetime
 
+# ============ CACHE HELPERS ============
+
+async def get_cached_user(user_id: str) -> Optional[dict]:
+    """Fetch a cached user document from Redis (cache-aside read path)"""
+    try:
+        cached = await redis_client.get(f'user:{user_id}')
+        if cached:
+            return json.loads(cached)
+    except Exception as e:
+        logger.warning(f"Redis unavailable, falling back to Mongo: {e}")
+    return None
+
+async def cache_user(user: dict):
+    """Store a user document in Redis with a short TTL"""
+    # No cache consumer needs the hash (login reads Mongo directly);
+    # keep it out of Redis
+    doc = {k: v for k, v in user.items() if k not in ('_id', 'password_hash')}
+    try:
+        await redis_client.set(f"user:{doc['id']}", json.dumps(doc, default=str), ex=USER_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to cache user {doc.get('id')}: {e}")
+
+async def invalidate_user_cache(user_id: str):
+    """Drop a user from the Redis cache after a write"""
+    try:
+        await redis_client.delete(f'user:{user_id}')
+    except Exception as e:
+        logger.warning(f"Failed to invalidate user cache {user_id}: {e}")
+
+# Projections matching the response models: fetch only what we serialize
+CAREGIVER_PROJECTION = {field: 1 for field in CaregiverProfileResponse.model_fields} | {'_id': 0}
+BOOKING_PROJECTION = {field: 1 for field in BookingResponse.model_fields} | {'_id': 0}
+# List cards skip the heavy media and free-text fields; details fetch them
+LIST_CAREGIVER_PROJECTION = {
+    f: v for f, v in CAREGIVER_PROJECTION.items() if f not in ('photo', 'video_intro_url')
+}
+LIST_BOOKING_PROJECTION = {f: v for f, v in BOOKING_PROJECTION.items() if f != 'notes'}
+# Keeps the hash off the wire too, not just out of the response
+PROJECT_USER = {'_id': 0, 'password_hash': 0}
+
 # ============ AUTH HELPERS ============
 
+# Argon2id (C implementation) for new hashes; legacy bcrypt hashes still verify
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return password_hasher.hash(password)
+
+# Verified against when a login hits an unknown email, so response timing
+# does not reveal whether the account exists
+_DUMMY_HASH = password_hasher.hash('unused-constant-for-timing')
 
 def verify_password(password: str, hashed: str) -> bool:
+    if hashed.startswith('$argon2'):
+        try:
+            return password_hasher.verify(hashed, password)
+        except (VerifyMismatchError, VerificationError, InvalidHashError):
+            return False
+    # Legacy bcrypt hash from before the Argon2 migration
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
-def create_access_token(user_id: str, role: str) -> str:
+# JWT exp is an int epoch anyway; adding seconds directly skips the
+# datetime/timedelta allocations on every token issued
+_ACCESS_TTL_SECONDS = JWT_ACCESS_EXPIRATION_HOURS * 3600
+_REFRESH_TTL_SECONDS = JWT_REFRESH_EXPIRATION_DAYS * 86400
+
+def create_access_token(user_id: str, role: str, token_version: int = 0,
+                        caregiver_profile_id: Optional[str] = None) -> str:
     payload = {
         'user_id': user_id,
         'role': role,
+        'token_version': token_version,
         'type': 'access',
-        'exp': datetime.utcnow() + timedelta(hours=JWT_ACCESS_EXPIRATION_HOURS)
+        'exp': int(time.time()) + _ACCESS_TTL_SECONDS
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    if caregiver_profile_id:
+        payload['caregiver_profile_id'] = caregiver_profile_id
+    return jwt.encode(payload, _JWT_KEY, algorithm=JWT_ALGORITHM)
 
-def create_refresh_token(user_id: str) -> str:
+def create_refresh_token(user_id: str, token_version: int = 0) -> str:
     payload = {
         'user_id': user_id,
+        'token_version': token_version,
         'type': 'refresh',
-        'exp': datetime.utcnow() + timedelta(days=JWT_REFRESH_EXPIRATION_DAYS)
+        'exp': int(time.time()) + _REFRESH_TTL_SECONDS
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode(payload, _JWT_KEY, algorithm=JWT_ALGORITHM)
+
+async def get_caregiver_profile_id(user: dict) -> Optional[str]:
+    """Resolve the caregiver's profile id, skipping Mongo when denormalized"""
+    profile_id = user.get('caregiver_profile_id')
+    if profile_id:
+        return profile_id
+    profile = await db.caregiver_profiles.find_one({'user_id': user['id']}, {'id': 1})
+    return profile['id'] if profile else None
+
+async def revoke_user_tokens(user_id: str):
+    """Invalidate all outstanding access tokens for a user by bumping token_version"""
+    await db.users.update_one({'id': user_id}, {'$inc': {'token_version': 1}})
+    await invalidate_user_cache(user_id)
+
+# Memoized decodes: clients poll with the same token, so hot tokens skip
+# the HMAC verify. Revocation still applies via the token_version check.
+JWT_CACHE_TTL_SECONDS = 60
+JWT_CACHE_MAX_ENTRIES = 10000
+_jwt_cache: Dict[str, tuple] = {}
+
+def decode_access_token(token: str) -> dict:
+    now = time.monotonic()
+    cached = _jwt_cache.get(token)
+    if cached and cached[0] > now:
+        return cached[1]
+    payload = jwt.decode(token, _JWT_KEY, algorithms=[JWT_ALGORITHM],
+                         options={'require': ['exp']})
+    if len(_jwt_cache) >= JWT_CACHE_MAX_ENTRIES:
+        _jwt_cache.clear()
+    # Never cache past the token's own expiry
+    ttl = min(JWT_CACHE_TTL_SECONDS, payload.get('exp', 0) - time.time())
+    if ttl > 0:
+        _jwt_cache[token] = (now + ttl, payload)
+    return payload
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Anything without exactly two dots can't be a JWT; reject it before
+    # spending an HMAC verification on fuzzing traffic
+    if credentials.credentials.count('.') != 2:
+        raise HTTPException(status_code=401, detail='Invalid token')
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_access_token(credentials.credentials)
         if payload.get('type') != 'access':
             raise HTTPException(status_code=401, detail='Invalid token type')
-        user = await db.users.find_one({'id': payload['user_id']})
-        if not user:
-            raise HTTPException(status_code=401, detail='User not found')
+        user = await get_cached_user(payload['user_id'])
+        if user is None:
+            user = await db.users.find_one({'id': payload['user_id']})
+            if not user:
+                raise HTTPException(status_code=401, detail='User not found')
+            await cache_user(user)
+        # Per-user revocation: tokens minted before a version bump are rejected
+        if payload.get('token_version', 0) != user.get('token_version', 0):
+            raise HTTPException(status_code=401, detail='Token revoked')
+        # Tokens minted before the profile id was denormalized still carry it
+        if 'caregiver_profile_id' not in user and payload.get('caregiver_profile_id'):
+            user['caregiver_profile_id'] = payload['caregiver_profile_id']
         return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail='Token expired')
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail='Invalid token')
 
+ADMIN_ROLES = frozenset({'admin'})
+
+async def require_self_or_admin(user_id: str, user = Depends(get_current_user)):
+    """Resolve the caller and reject unless they own user_id or are admin"""
+    if user['id'] != user_id and user['role'] not in ADMIN_ROLES:
+        raise HTTPException(status_code=403, detail='Access denied')
+    return user
+
 # ============ SMART MATCH ALGORITHM ============
 
+# Catalog values get stable low bits; free-form values hash into bits 32-63
+# so masks stay comparable across deploys. Append-only: never reorder.
+SPECIALIZATION_BITS = {name: 1 << i for i, name in enumerate([
+    'Cuidados Gerais', 'Alzheimer/Demência', 'Pós-Operatório',
+    'Fisioterapia', 'Enfermagem', 'Acompanhamento Hospitalar',
+    'Cuidados Noturnos', 'Mobilidade Reduzida', 'Diabetes', 'Hipertensão',
+    'Companhia', 'Cuidados Médicos'
+])}
+LANGUAGE_BITS = {name: 1 << i for i, name in enumerate([
+    'Português', 'Inglês', 'Espanhol', 'Italiano', 'Francês', 'Alemão', 'Libras'
+])}
+HOBBY_BITS: Dict[str, int] = {}
+
+def feature_mask(values: List[str], catalog: Dict[str, int]) -> int:
+    """Pack a list of feature strings into a 64-bit membership mask"""
+    mask = 0
+    for value in values:
+        # hashed bits stop at 62 so masks stay within BSON's signed int64
+        mask |= catalog.get(value) or 1 << (32 + zlib.crc32(value.encode()) % 31)
+    return mask
+
+CARE_LEVEL_SPECIALIZATIONS = {
+    'companionship': frozenset({'Cuidados Gerais', 'Companhia'}),
+    'mobility': frozenset({'Mobilidade Reduzida', 'Fisioterapia'}),
+    'medical': frozenset({'Enfermagem', 'Cuidados Médicos'}),
+    'alzheimer': frozenset({'Alzheimer/Demência'}),
+    'post_surgery': frozenset({'Pós-Operatório', 'Enfermagem'})
+}
+CARE_LEVEL_MASKS = {
+    level: feature_mask(sorted(specs), SPECIALIZATION_BITS)
+    for level, specs in CARE_LEVEL_SPECIALIZATIONS.items()
+}
+
+def caregiver_match_masks(profile: dict) -> dict:
+    """Masks persisted on caregiver profiles at write time"""
+    return {
+        'specializations_mask': feature_mask(profile.get('specializations', []), SPECIALIZATION_BITS),
+        'languages_mask': feature_mask(profile.get('languages', []), LANGUAGE_BITS),
+        'hobbies_mask': feature_mask(profile.get('hobbies', []), HOBBY_BITS)
+    }
+
 def calculate_match_score(caregiver: dict, client_profile: dict) -> float:
     """Calculate compatibility score between caregiver and client needs"""
     score = 0.0
     max_score = 100.0
-    
+
     # Care level match (30 points)
     care_level = client_profile.get('care_level', 'companionship')
-    specializations = caregiver.get('specializations', [])
-    
-    care_level_mapping = {
-        'companionship': ['Cuidados Gerais', 'Companhia'],
-        'mobility': ['Mobilidade Reduzida', 'Fisioterapia'],
-        'medical': ['Enfermagem', 'Cuidados Médicos'],
-        'alzheimer': ['Alzheimer/Demência'],
-        'post_surgery': ['Pós-Operatório', 'Enfermagem']
-    }
-    
-    required_specs = care_level_mapping.get(care_level, [])
-    if any(spec in specializations for spec in required_specs):
+    required_mask = CARE_LEVEL_MASKS.get(care_level, 0)
+    spec_mask = caregiver.get('specializations_mask')
+    if spec_mask is None:
+        spec_mask = feature_mask(caregiver.get('specializations', []), SPECIALIZATION_BITS)
+    if spec_mask & required_mask:
         score += 30
-    elif specializations:
+    elif spec_mask:
         score += 15
-    
+
     # Language match (15 points)
-    client_langs = client_profile.get('preferred_languages', ['Português'])
-    caregiver_langs = caregiver.get('languages', ['Português'])
-    if any(lang in caregiver_langs for lang in client_langs):
+    client_lang_mask = feature_mask(client_profile.get('preferred_languages', ['Português']), LANGUAGE_BITS)
+    lang_mask = caregiver.get('languages_mask')
+    if lang_mask is None:
+        lang_mask = feature_mask(caregiver.get('languages', ['Português']), LANGUAGE_BITS)
+    if lang_mask & client_lang_mask:
         score += 15
     
     # Location match (15 points)
@@ -341,65 +606,138 @@ def calculate_match_score(caregiver: dict, client_profile: dict) -> float:
         score += 5
     
     # Hobbies match (10 points)
-    client_hobbies = set(client_profile.get('elder_hobbies', []))
-    caregiver_hobbies = set(caregiver.get('hobbies', []))
-    if client_hobbies and caregiver_hobbies:
-        overlap = len(client_hobbies.intersection(caregiver_hobbies))
+    client_hobby_mask = feature_mask(client_profile.get('elder_hobbies', []), HOBBY_BITS)
+    hobby_mask = caregiver.get('hobbies_mask')
+    if hobby_mask is None:
+        hobby_mask = feature_mask(caregiver.get('hobbies', []), HOBBY_BITS)
+    if client_hobby_mask and hobby_mask:
+        overlap = (client_hobby_mask & hobby_mask).bit_count()
         score += min(overlap * 3, 10)
-    
+
     return min(round(score, 1), max_score)
 
+def build_match_score_stage(client_profile: dict) -> dict:
+    """Build an $addFields stage computing match_score server-side.
+
+    Mirrors calculate_match_score so ranking (and therefore skip/limit
+    pagination) happens inside Mongo instead of after the fetch.
+    """
+    required_specs = sorted(
+        CARE_LEVEL_SPECIALIZATIONS.get(client_profile.get('care_level', 'companionship'), frozenset()))
+    client_langs = client_profile.get('preferred_languages', ['Português'])
+    client_city = client_profile.get('elder_city', '').lower()
+    client_hobbies = client_profile.get('elder_hobbies', [])
+
+    specs = {'$ifNull': ['$specializations', []]}
+    exp = {'$ifNull': ['$experience_years', 0]}
+
+    parts = [
+        # Care level match (30 points, 15 for any specialization)
+        {'$cond': [
+            {'$gt': [{'$size': {'$setIntersection': [specs, required_specs]}}, 0]}, 30,
+            {'$cond': [{'$gt': [{'$size': specs}, 0]}, 15, 0]}
+        ]},
+        # Language match (15 points)
+        {'$cond': [
+            {'$gt': [{'$size': {'$setIntersection': [{'$ifNull': ['$languages', ['Português']]}, client_langs]}}, 0]},
+            15, 0
+        ]},
+        # Location match (15 points)
+        {'$cond': [{'$eq': [{'$toLower': {'$ifNull': ['$city', '']}}, client_city]}, 15, 0]},
+        # Pet compatibility (10 points)
+        {'$cond': [{'$eq': [{'$ifNull': ['$accepts_pets', True]}, True]}, 10, 0]}
+        if client_profile.get('has_pets') else 10,
+        # Driver requirement (10 points)
+        {'$cond': [{'$eq': [{'$ifNull': ['$has_car', False]}, True]}, 10, 0]}
+        if client_profile.get('needs_driver') else 10,
+        # Experience bonus (10 points)
+        {'$switch': {'branches': [
+            {'case': {'$gte': [exp, 5]}, 'then': 10},
+            {'case': {'$gte': [exp, 2]}, 'then': 5}
+        ], 'default': 0}},
+        # Hobbies match (10 points)
+        {'$min': [
+            {'$multiply': [{'$size': {'$setIntersection': [{'$ifNull': ['$hobbies', []]}, client_hobbies]}}, 3]},
+            10
+        ]} if client_hobbies else 0
+    ]
+
+    return {'$addFields': {'match_score': {'$min': [{'$add': parts}, 100]}}}
+
 # ============ AI HELPERS ============
 
-async def generate_care_summary(care_logs: List[dict]) -> str:
+async def generate_care_summary(logs_text: str, total_entries: int) -> str:
     """Use AI to generate a summary of the care day"""
-    if not care_logs:
+    if not logs_text:
         return "Sem registros de cuidado ainda."
-    
-    logs_text = "\n".join([
-        f"- {log['entry_type']}: {log['description']}" 
-        for log in care_logs
-    ])
-    
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {EMERGENT_LLM_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "Você é um assistente que resume registros de cuidados com idosos para familiares. Seja breve, carinhoso e informativo. Responda em português brasileiro."
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Resuma os seguintes registros de cuidado do dia para enviar à família:\n\n{logs_text}"
-                        }
-                    ],
-                    "max_tokens": 300
-                },
-                timeout=30.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data['choices'][0]['message']['content']
+        response = await http_client.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {EMERGENT_LLM_KEY}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "gpt-4o-mini",
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "Você é um assistente que resume registros de cuidados com idosos para familiares. Seja breve, carinhoso e informativo. Responda em português brasileiro."
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Resuma os seguintes registros de cuidado do dia para enviar à família:\n\n{logs_text}"
+                    }
+                ],
+                "max_tokens": 300
+            }
+        )
+
+        if response.status_code == 200:
+            data = response.json()
+            return data['choices'][0]['message']['content']
     except Exception as e:
         logger.error(f"AI summary error: {e}")
-    
-    return f"Resumo do dia: {len(care_logs)} atividades registradas."
+
+    return f"Resumo do dia: {total_entries} atividades registradas."
+
+# ============ ADMIN STATS (materialized view) ============
+
+ADMIN_STAT_FIELDS = (
+    'total_caregivers', 'verified_caregivers', 'total_clients', 'total_bookings',
+    'completed_bookings', 'pending_verifications', 'active_emergencies'
+)
+
+async def bump_stats(**counters):
+    """Incrementally maintain the singleton admin stats document"""
+    await db.stats.update_one({'_id': 'global'}, {'$inc': counters}, upsert=True)
+
+async def rebuild_admin_stats() -> dict:
+    """Recount everything once (cold start / drift repair) and persist.
+
+    The counts are independent, so they run concurrently over the pool.
+    """
+    # Unfiltered totals read collection metadata (O(1)) instead of scanning
+    counts = await asyncio.gather(
+        db.caregiver_profiles.estimated_document_count(),
+        db.caregiver_profiles.count_documents({'verified': True}),
+        db.client_profiles.estimated_document_count(),
+        db.bookings.estimated_document_count(),
+        db.bookings.count_documents({'status': 'completed'}),
+        db.verifications.count_documents({'status': 'pending'}),
+        db.emergencies.count_documents({'status': 'active'})
+    )
+    stats = dict(zip(ADMIN_STAT_FIELDS, counts))
+    await db.stats.update_one({'_id': 'global'}, {'$set': stats}, upsert=True)
+    return stats
 
 # ============ NOTIFICATION HELPERS ============
 
-async def create_notification(user_id: str, title: str, message: str, notification_type: str, data: dict = None):
-    """Create a notification for a user"""
-    notification = {
-        'id': str(uuid.uuid4()),
+def build_notification(user_id: str, title: str, message: str, notification_type: str, data: dict = None) -> dict:
+    """Build a notification document (insert is the caller's choice)"""
+    return {
+        'id': new_id(),
         'user_id': user_id,
         'title': title,
         'message': message,
@@ -408,7 +746,14 @@ async def create_notification(user_id: str, title: str, message: str, notificati
         'data': data or {},
         'created_at': datetime.utcnow()
     }
-    await db.notifications.insert_one(notification)
+
+async def create_notification(user_id: str, title: str, message: str, notification_type: str, data: dict = None):
+    """Create a notification for a user"""
+    notification = build_notification(user_id, title, message, notification_type, data)
+    await asyncio.gather(
+        db.notifications.insert_one(notification),
+        db.users.update_one({'id': user_id}, {'$inc': {'unread_count': 1}})
+    )
     return notification
 
 # ============ AUTH ENDPOINTS ============
@@ -419,20 +764,23 @@ async def register(user_data: UserCreate):
     if existing:
         raise HTTPException(status_code=400, detail='Email already registered')
     
-    user_id = str(uuid.uuid4())
+    user_id = new_id()
     user = {
         'id': user_id,
         'name': user_data.name,
         'email': user_data.email,
         'phone': user_data.phone,
-        'password_hash': hash_password(user_data.password),
+        # Hashing is CPU-bound (~100ms); run it off the event loop
+        'password_hash': await asyncio.to_thread(hash_password, user_data.password),
         'role': user_data.role,
         'verified': False,
         'senior_mode': False,
+        'token_version': 0,
+        'unread_count': 0,
         'created_at': datetime.utcnow()
     }
     await db.users.insert_one(user)
-    
+
     access_token = create_access_token(user_id, user_data.role)
     refresh_token = create_refresh_token(user_id)
     
@@ -454,11 +802,14 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login")
 async def login(credentials: UserLogin):
     user = await db.users.find_one({'email': credentials.email})
-    if not user or not verify_password(credentials.password, user['password_hash']):
+    password_hash = user['password_hash'] if user else _DUMMY_HASH
+    password_ok = await asyncio.to_thread(verify_password, credentials.password, password_hash)
+    if not user or not password_ok:
         raise HTTPException(status_code=401, detail='Invalid credentials')
     
-    access_token = create_access_token(user['id'], user['role'])
-    refresh_token = create_refresh_token(user['id'])
+    access_token = create_access_token(
+        user['id'], user['role'], user.get('token_version', 0), user.get('caregiver_profile_id'))
+    refresh_token = create_refresh_token(user['id'], user.get('token_version', 0))
     
     return {
         'access_token': access_token,
@@ -478,15 +829,23 @@ async def login(credentials: UserLogin):
 @api_router.post("/auth/refresh")
 async def refresh_token(refresh_token: str = Form(...)):
     try:
-        payload = jwt.decode(refresh_token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(refresh_token, _JWT_KEY, algorithms=[JWT_ALGORITHM],
+                             options={'require': ['exp']})
         if payload.get('type') != 'refresh':
             raise HTTPException(status_code=401, detail='Invalid token type')
         
         user = await db.users.find_one({'id': payload['user_id']})
         if not user:
             raise HTTPException(status_code=401, detail='User not found')
-        
-        new_access_token = create_access_token(user['id'], user['role'])
+        if user.get('suspended'):
+            raise HTTPException(status_code=401, detail='Account suspended')
+        # Refresh tokens carry the version too, so a revocation bump kills
+        # them instead of letting clients re-mint fresh access tokens
+        if payload.get('token_version', 0) != user.get('token_version', 0):
+            raise HTTPException(status_code=401, detail='Token revoked')
+
+        new_access_token = create_access_token(
+            user['id'], user['role'], user.get('token_version', 0), user.get('caregiver_profile_id'))
         return {'access_token': new_access_token, 'token_type': 'bearer'}
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail='Refresh token expired')
@@ -497,17 +856,13 @@ async def refresh_token(refresh_token: str = Form(...)):
 async def get_me(user = Depends(get_current_user)):
     profile = None
     if user['role'] == 'caregiver':
-        profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
+        profile = await db.caregiver_profiles.find_one({'user_id': user['id']}, {'_id': 0})
     elif user['role'] == 'client':
-        profile = await db.client_profiles.find_one({'user_id': user['id']})
-    
-    # Remove MongoDB _id field
-    if profile and '_id' in profile:
-        del profile['_id']
-    
-    # Check for pending notifications
-    unread_count = await db.notifications.count_documents({'user_id': user['id'], 'read': False})
-    
+        profile = await db.client_profiles.find_one({'user_id': user['id']}, {'_id': 0})
+
+    # Unread badge comes from the counter maintained on the user doc
+    unread_count = user.get('unread_count', 0)
+
     return {
         'user': {
             'id': user['id'],
@@ -526,6 +881,7 @@ async def get_me(user = Depends(get_current_user)):
 async def toggle_senior_mode(enabled: bool, user = Depends(get_current_user)):
     """Toggle Senior Mode for accessibility"""
     await db.users.update_one({'id': user['id']}, {'$set': {'senior_mode': enabled}})
+    await invalidate_user_cache(user['id'])
     return {'senior_mode': enabled}
 
 # ============ CAREGIVER ENDPOINTS ============
@@ -539,7 +895,7 @@ async def create_caregiver_profile(profile_data: CaregiverProfileCreate, user =
     if existing:
         raise HTTPException(status_code=400, detail='Profile already exists')
     
-    profile_id = str(uuid.uuid4())
+    profile_id = new_id()
     profile = {
         'id': profile_id,
         'user_id': user['id'],
@@ -547,17 +903,23 @@ async def create_caregiver_profile(profile_data: CaregiverProfileCreate, user =
         'user_email': user['email'],
         'user_phone': user['phone'],
         **profile_data.dict(),
+        **caregiver_match_masks(profile_data.dict()),
         'verified': False,
         'background_check_status': 'pending',
         'background_check_expiry': None,
         'biometric_verified': False,
         'last_biometric_check': None,
         'rating': 0.0,
+        'rating_sum': 0,
         'total_reviews': 0,
         'photo': None,
         'created_at': datetime.utcnow()
     }
     await db.caregiver_profiles.insert_one(profile)
+    # Denormalize onto the user so auth paths skip the profile lookup
+    await db.users.update_one({'id': user['id']}, {'$set': {'caregiver_profile_id': profile_id}})
+    await invalidate_user_cache(user['id'])
+    await bump_stats(total_caregivers=1)
     return CaregiverProfileResponse(**profile)
 
 @api_router.put("/caregivers/profile", response_model=CaregiverProfileResponse)
@@ -565,19 +927,20 @@ async def update_caregiver_profile(profile_data: CaregiverProfileCreate, user =
     if user['role'] != 'caregiver':
         raise HTTPException(status_code=403, detail='Only caregivers can update caregiver profiles')
     
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-    if not profile:
-        raise HTTPException(status_code=404, detail='Profile not found')
-    
     update_data = {
         **profile_data.dict(),
+        **caregiver_match_masks(profile_data.dict()),
         'user_name': user['name'],
         'user_email': user['email'],
         'user_phone': user['phone']
     }
-    await db.caregiver_profiles.update_one({'user_id': user['id']}, {'$set': update_data})
-    
-    updated = await db.caregiver_profiles.find_one({'user_id': user['id']})
+    updated = await db.caregiver_profiles.find_one_and_update(
+        {'user_id': user['id']},
+        {'$set': update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail='Profile not found')
     return CaregiverProfileResponse(**updated)
 
 @api_router.post("/caregivers/photo")
@@ -608,10 +971,11 @@ async def list_caregivers(
     user = Depends(get_current_user)
 ):
     query = {}
+    # Anchored prefixes keep the regex filters index-eligible
     if city:
-        query['city'] = {'$regex': city, '$options': 'i'}
+        query['city'] = {'$regex': f'^{re.escape(city)}', '$options': 'i'}
     if neighborhood:
-        query['neighborhood'] = {'$regex': neighborhood, '$options': 'i'}
+        query['neighborhood'] = {'$regex': f'^{re.escape(neighborhood)}', '$options': 'i'}
     if min_price is not None:
         query['price_hour'] = {'$gte': min_price}
     if max_price is not None:
@@ -625,18 +989,24 @@ async def list_caregivers(
     if min_rating is not None:
         query['rating'] = {'$gte': min_rating}
     
-    caregivers = await db.caregiver_profiles.find(query).skip(skip).limit(limit).to_list(limit)
-    
-    # Apply Smart Match if client has profile
+    # Smart Match: score and rank inside Mongo so skip/limit paginate the
+    # ranked list instead of an arbitrary page
     if smart_match and user['role'] == 'client':
         client_profile = await db.client_profiles.find_one({'user_id': user['id']})
         if client_profile:
-            for cg in caregivers:
-                cg['match_score'] = calculate_match_score(cg, client_profile)
-            # Sort by match score
-            caregivers.sort(key=lambda x: x.get('match_score', 0), reverse=True)
-    
-    return [CaregiverProfileResponse(**c) for c in caregivers]
+            pipeline = [
+                {'$match': query},
+                build_match_score_stage(client_profile),
+                {'$sort': {'match_score': -1}},
+                {'$skip': skip},
+                {'$limit': limit},
+                {'$project': LIST_CAREGIVER_PROJECTION | {'match_score': 1}}
+            ]
+            caregivers = await db.caregiver_profiles.aggregate(pipeline).to_list(limit)
+            return [CaregiverProfileResponse(**c) for c in caregivers]
+
+    cursor = db.caregiver_profiles.find(query, LIST_CAREGIVER_PROJECTION).skip(skip).limit(limit)
+    return [CaregiverProfileResponse.model_construct(**c) async for c in cursor]
 
 @api_router.get("/caregivers/{caregiver_id}", response_model=CaregiverProfileResponse)
 async def get_caregiver(caregiver_id: str, user = Depends(get_current_user)):
@@ -652,6 +1022,14 @@ async def get_caregiver(caregiver_id: str, user = Depends(get_current_user)):
     
     return CaregiverProfileResponse(**caregiver)
 
+@api_router.get("/caregivers/{caregiver_id}/photo")
+async def get_caregiver_photo(caregiver_id: str, user = Depends(get_current_user)):
+    """Fetch only the caregiver's photo, kept off the list views"""
+    caregiver = await db.caregiver_profiles.find_one({'id': caregiver_id}, {'_id': 0, 'photo': 1})
+    if not caregiver:
+        raise HTTPException(status_code=404, detail='Caregiver not found')
+    return {'photo': caregiver.get('photo')}
+
 # ============ CLIENT ENDPOINTS ============
 
 @api_router.post("/clients/profile", response_model=ClientProfileResponse)
@@ -663,7 +1041,7 @@ async def create_client_profile(profile_data: ClientProfileCreate, user = Depend
     if existing:
         raise HTTPException(status_code=400, detail='Profile already exists')
     
-    profile_id = str(uuid.uuid4())
+    profile_id = new_id()
     profile = {
         'id': profile_id,
         'user_id': user['id'],
@@ -671,6 +1049,7 @@ async def create_client_profile(profile_data: ClientProfileCreate, user = Depend
         'created_at': datetime.utcnow()
     }
     await db.client_profiles.insert_one(profile)
+    await bump_stats(total_clients=1)
     return ClientProfileResponse(**profile)
 
 @api_router.put("/clients/profile", response_model=ClientProfileResponse)
@@ -678,12 +1057,13 @@ async def update_client_profile(profile_data: ClientProfileCreate, user = Depend
     if user['role'] != 'client':
         raise HTTPException(status_code=403, detail='Only clients can update client profiles')
     
-    profile = await db.client_profiles.find_one({'user_id': user['id']})
-    if not profile:
+    updated = await db.client_profiles.find_one_and_update(
+        {'user_id': user['id']},
+        {'$set': profile_data.dict()},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
         raise HTTPException(status_code=404, detail='Profile not found')
-    
-    await db.client_profiles.update_one({'user_id': user['id']}, {'$set': profile_data.dict()})
-    updated = await db.client_profiles.find_one({'user_id': user['id']})
     return ClientProfileResponse(**updated)
 
 @api_router.get("/clients/profile", response_model=ClientProfileResponse)
@@ -702,16 +1082,19 @@ async def create_booking(booking_data: BookingCreate, user = Depends(get_current
     if user['role'] != 'client':
         raise HTTPException(status_code=403, detail='Only clients can create bookings')
     
-    caregiver = await db.caregiver_profiles.find_one({'id': booking_data.caregiver_id})
+    # The two reads are independent; issue them concurrently
+    caregiver, client_profile = await asyncio.gather(
+        db.caregiver_profiles.find_one({'id': booking_data.caregiver_id}),
+        db.client_profiles.find_one({'user_id': user['id']})
+    )
     if not caregiver:
         raise HTTPException(status_code=404, detail='Caregiver not found')
-    
+
     # Check if caregiver is blocked (expired background check or biometric)
     if caregiver.get('background_check_expiry'):
         if datetime.utcnow() > caregiver['background_check_expiry']:
             raise HTTPException(status_code=400, detail='Caregiver verification has expired')
-    
-    client_profile = await db.client_profiles.find_one({'user_id': user['id']})
+
     if not client_profile:
         raise HTTPException(status_code=400, detail='Please create a client profile first')
     
@@ -724,7 +1107,7 @@ async def create_booking(booking_data: BookingCreate, user = Depends(get_current
     platform_fee_cents = int(price_cents * PLATFORM_FEE_PERCENT / 100)
     total_cents = price_cents + platform_fee_cents
     
-    booking_id = str(uuid.uuid4())
+    booking_id = new_id()
     booking = {
         'id': booking_id,
         'caregiver_id': booking_data.caregiver_id,
@@ -748,17 +1131,21 @@ async def create_booking(booking_data: BookingCreate, user = Depends(get_current
         'check_out_time': None,
         'created_at': datetime.utcnow()
     }
-    await db.bookings.insert_one(booking)
-    
-    # Notify caregiver
-    await create_notification(
+    # Notify caregiver; both writes go to independent collections
+    notification = build_notification(
         caregiver['user_id'],
         'Nova solicitação de cuidado',
         f'{user["name"]} solicitou seus serviços para {client_profile["elder_name"]}',
         'booking_request',
         {'booking_id': booking_id}
     )
-    
+    await asyncio.gather(
+        db.bookings.insert_one(booking),
+        db.notifications.insert_one(notification),
+        db.users.update_one({'id': caregiver['user_id']}, {'$inc': {'unread_count': 1}}),
+        bump_stats(total_bookings=1)
+    )
+
     return BookingResponse(**booking)
 
 @api_router.get("/bookings", response_model=List[BookingResponse])
@@ -767,25 +1154,26 @@ async def list_bookings(status: Optional[str] = None, user = Depends(get_current
     if user['role'] == 'client':
         query['client_id'] = user['id']
     elif user['role'] == 'caregiver':
-        profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-        if profile:
-            query['caregiver_id'] = profile['id']
+        profile_id = await get_caregiver_profile_id(user)
+        if profile_id:
+            query['caregiver_id'] = profile_id
     
     if status:
         query['status'] = status
     
-    bookings = await db.bookings.find(query).sort('created_at', -1).to_list(100)
-    return [BookingResponse(**b) for b in bookings]
+    cursor = db.bookings.find(query, LIST_BOOKING_PROJECTION).sort('created_at', -1).limit(100)
+    return [BookingResponse.model_construct(**b) async for b in cursor]
 
 @api_router.get("/bookings/{booking_id}", response_model=BookingResponse)
 async def get_booking(booking_id: str, user = Depends(get_current_user)):
-    booking = await db.bookings.find_one({'id': booking_id})
+    # Booking and profile-id lookups are independent; issue them together
+    booking, caregiver_profile_id = await asyncio.gather(
+        db.bookings.find_one({'id': booking_id}),
+        get_caregiver_profile_id(user)
+    )
     if not booking:
         raise HTTPException(status_code=404, detail='Booking not found')
-    
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-    caregiver_profile_id = profile['id'] if profile else None
-    
+
     if user['role'] == 'client' and booking['client_id'] != user['id']:
         raise HTTPException(status_code=403, detail='Access denied')
     if user['role'] == 'caregiver' and booking['caregiver_id'] != caregiver_profile_id:
@@ -799,13 +1187,13 @@ async def update_booking_status(
     status: Literal['confirmed', 'in_progress', 'completed', 'cancelled'],
     user = Depends(get_current_user)
 ):
-    booking = await db.bookings.find_one({'id': booking_id})
+    booking, caregiver_profile_id = await asyncio.gather(
+        db.bookings.find_one({'id': booking_id}),
+        get_caregiver_profile_id(user)
+    )
     if not booking:
         raise HTTPException(status_code=404, detail='Booking not found')
-    
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-    caregiver_profile_id = profile['id'] if profile else None
-    
+
     if user['role'] == 'caregiver' and booking['caregiver_id'] != caregiver_profile_id:
         raise HTTPException(status_code=403, detail='Access denied')
     if user['role'] == 'client' and booking['client_id'] != user['id']:
@@ -821,30 +1209,46 @@ async def update_booking_status(
     elif status == 'cancelled':
         update_data['escrow_status'] = 'refunded'
     
-    await db.bookings.update_one({'id': booking_id}, {'$set': update_data})
-    
-    # Send notifications
-    if status == 'confirmed':
-        await create_notification(
-            booking['client_id'],
-            'Agendamento confirmado!',
-            f'{booking["caregiver_name"]} aceitou cuidar de {booking["elder_name"]}',
-            'booking_confirmed',
-            {'booking_id': booking_id}
-        )
-    elif status == 'completed':
-        await create_notification(
-            booking['client_id'],
-            'Cuidado finalizado',
-            f'O atendimento de {booking["elder_name"]} foi concluído',
-            'booking_completed',
-            {'booking_id': booking_id}
-        )
-    
+    # Independent collections: issue the update, stats bump and fallback
+    # notification in one round of concurrent writes
+    writes = [db.bookings.update_one({'id': booking_id}, {'$set': update_data})]
+    if status == 'completed' and booking['status'] != 'completed':
+        writes.append(bump_stats(completed_bookings=1))
+
+    # The change-stream consumer emits these; notify inline only when it's down
+    if not booking_stream_active:
+        if status == 'confirmed':
+            writes.append(create_notification(
+                booking['client_id'],
+                'Agendamento confirmado!',
+                f'{booking["caregiver_name"]} aceitou cuidar de {booking["elder_name"]}',
+                'booking_confirmed',
+                {'booking_id': booking_id}
+            ))
+        elif status == 'completed':
+            writes.append(create_notification(
+                booking['client_id'],
+                'Cuidado finalizado',
+                f'O atendimento de {booking["elder_name"]} foi concluído',
+                'booking_completed',
+                {'booking_id': booking_id}
+            ))
+    await asyncio.gather(*writes)
+
     return {'message': f'Booking status updated to {status}'}
 
 # ============ CARE LOG ENDPOINTS ============
 
+_CARE_LOG_TITLES = {
+    'check_in': 'Cuidador chegou!',
+    'check_out': 'Cuidado finalizado',
+    'medication': 'Medicação administrada',
+    'meal': 'Refeição registrada',
+    'vital_signs': 'Sinais vitais medidos',
+    'activity': 'Atividade realizada',
+    'emergency': '⚠️ EMERGÊNCIA'
+}
+
 @api_router.post("/care-log", response_model=CareLogResponse)
 async def create_care_log_entry(entry: CareLogEntry, background_tasks: BackgroundTasks, user = Depends(get_current_user)):
     if user['role'] != 'caregiver':
@@ -854,8 +1258,8 @@ async def create_care_log_entry(entry: CareLogEntry, background_tasks: Backgroun
     if not booking:
         raise HTTPException(status_code=404, detail='Booking not found')
     
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-    if not profile or booking['caregiver_id'] != profile['id']:
+    profile_id = await get_caregiver_profile_id(user)
+    if not profile_id or booking['caregiver_id'] != profile_id:
         raise HTTPException(status_code=403, detail='Access denied')
     
     # Handle check-in/check-out
@@ -870,56 +1274,50 @@ async def create_care_log_entry(entry: CareLogEntry, background_tasks: Backgroun
             {'$set': {'check_out_time': datetime.utcnow()}}
         )
     
-    log_id = str(uuid.uuid4())
+    # Offload the photo to the media bucket; inline base64 only when unconfigured
+    photo_url = await store_media(entry.photo_base64)
+
+    log_id = new_id()
     log_entry = {
         'id': log_id,
         'booking_id': entry.booking_id,
-        'caregiver_id': profile['id'],
+        'caregiver_id': profile_id,
         'entry_type': entry.entry_type,
         'description': entry.description,
         'vital_signs': entry.vital_signs,
-        'photo_base64': entry.photo_base64,
+        'photo_base64': None if photo_url else entry.photo_base64,
+        'photo_url': photo_url,
         'created_at': datetime.utcnow()
     }
-    await db.care_logs.insert_one(log_entry)
-    
     # Notify family
-    notification_titles = {
-        'check_in': 'Cuidador chegou!',
-        'check_out': 'Cuidado finalizado',
-        'medication': 'Medicação administrada',
-        'meal': 'Refeição registrada',
-        'vital_signs': 'Sinais vitais medidos',
-        'activity': 'Atividade realizada',
-        'emergency': '⚠️ EMERGÊNCIA'
-    }
-    
-    await create_notification(
-        booking['client_id'],
-        notification_titles.get(entry.entry_type, 'Atualização de cuidado'),
-        entry.description[:100],
-        f'care_log_{entry.entry_type}',
-        {'booking_id': entry.booking_id, 'log_id': log_id}
+    await asyncio.gather(
+        db.care_logs.insert_one(log_entry),
+        create_notification(
+            booking['client_id'],
+            _CARE_LOG_TITLES.get(entry.entry_type, 'Atualização de cuidado'),
+            preview(entry.description, 100),
+            f'care_log_{entry.entry_type}',
+            {'booking_id': entry.booking_id, 'log_id': log_id}
+        )
     )
-    
+
     return CareLogResponse(**log_entry)
 
-@api_router.get("/care-log/{booking_id}", response_model=List[CareLogResponse])
+@api_router.get("/care-log/{booking_id}")
 async def get_care_logs(booking_id: str, user = Depends(get_current_user)):
     booking = await db.bookings.find_one({'id': booking_id})
     if not booking:
         raise HTTPException(status_code=404, detail='Booking not found')
-    
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-    caregiver_profile_id = profile['id'] if profile else None
-    
+
+    caregiver_profile_id = await get_caregiver_profile_id(user)
+
     if user['role'] == 'client' and booking['client_id'] != user['id']:
         raise HTTPException(status_code=403, detail='Access denied')
     if user['role'] == 'caregiver' and booking['caregiver_id'] != caregiver_profile_id:
         raise HTTPException(status_code=403, detail='Access denied')
-    
-    logs = await db.care_logs.find({'booking_id': booking_id}).sort('created_at', -1).to_list(100)
-    return [CareLogResponse(**log) for log in logs]
+
+    # Documents were validated on the way in; serve them back as-is
+    return await db.care_logs.find({'booking_id': booking_id}, {'_id': 0}).sort('created_at', -1).to_list(100)
 
 @api_router.get("/care-log/{booking_id}/summary")
 async def get_care_summary(booking_id: str, user = Depends(get_current_user)):
@@ -931,13 +1329,28 @@ async def get_care_summary(booking_id: str, user = Depends(get_current_user)):
     if user['role'] == 'client' and booking['client_id'] != user['id']:
         raise HTTPException(status_code=403, detail='Access denied')
     
-    logs = await db.care_logs.find({'booking_id': booking_id}).sort('created_at', 1).to_list(100)
-    summary = await generate_care_summary(logs)
-    
-    return {'summary': summary, 'total_entries': len(logs)}
+    # Stream only the prompt fields instead of buffering 100 full
+    # documents (photos included) just to format an LLM prompt
+    cursor = db.care_logs.find(
+        {'booking_id': booking_id},
+        {'_id': 0, 'entry_type': 1, 'description': 1}
+    ).sort('created_at', 1).batch_size(25)
+
+    async def collect_log_lines() -> str:
+        return "\n".join([f"- {log['entry_type']}: {log['description']}" async for log in cursor])
+
+    logs_text, total_entries = await asyncio.gather(
+        collect_log_lines(),
+        db.care_logs.count_documents({'booking_id': booking_id})
+    )
+    summary = await generate_care_summary(logs_text, total_entries)
+
+    return {'summary': summary, 'total_entries': total_entries}
 
 # ============ EMERGENCY ENDPOINT ============
 
+_EMERGENCY_SERVICES_INFO = 'Ligue 192 (SAMU) ou 193 (Bombeiros)'
+
 @api_router.post("/emergency")
 async def trigger_emergency(alert: EmergencyAlert, user = Depends(get_current_user)):
     """Emergency panic button - notifies all family members and logs the emergency"""
@@ -949,7 +1362,8 @@ async def trigger_emergency(alert: EmergencyAlert, user = Depends(get_current_us
         raise HTTPException(status_code=404, detail='Booking not found')
     
     # Create emergency log
-    emergency_id = str(uuid.uuid4())
+    emergency_id = new_id()
+    now = datetime.utcnow()
     emergency_record = {
         'id': emergency_id,
         'booking_id': alert.booking_id,
@@ -958,44 +1372,46 @@ async def trigger_emergency(alert: EmergencyAlert, user = Depends(get_current_us
         'description': alert.description,
         'location': {'lat': alert.location_lat, 'lng': alert.location_lng},
         'status': 'active',
-        'created_at': datetime.utcnow()
+        'created_at': now
     }
-    await db.emergencies.insert_one(emergency_record)
-    
-    # Create care log entry
-    await db.care_logs.insert_one({
-        'id': str(uuid.uuid4()),
+    care_log_record = {
+        'id': new_id(),
         'booking_id': alert.booking_id,
         'caregiver_id': user['id'],
         'entry_type': 'emergency',
         'description': f'EMERGÊNCIA: {alert.emergency_type} - {alert.description}',
-        'created_at': datetime.utcnow()
-    })
-    
-    # Notify client with high priority
-    await create_notification(
-        booking['client_id'],
-        '🚨 EMERGÊNCIA MÉDICA',
-        f'{alert.emergency_type.upper()}: {alert.description}. Cuidador: {booking["caregiver_name"]}',
-        'emergency',
-        {
-            'emergency_id': emergency_id,
-            'booking_id': alert.booking_id,
-            'location': {'lat': alert.location_lat, 'lng': alert.location_lng}
-        }
+        'created_at': now
+    }
+
+    # All four writes are independent; fire them together
+    await asyncio.gather(
+        db.emergencies.insert_one(emergency_record),
+        db.care_logs.insert_one(care_log_record),
+        bump_stats(active_emergencies=1),
+        create_notification(
+            booking['client_id'],
+            '🚨 EMERGÊNCIA MÉDICA',
+            f'{alert.emergency_type.upper()}: {alert.description}. Cuidador: {booking["caregiver_name"]}',
+            'emergency',
+            {
+                'emergency_id': emergency_id,
+                'booking_id': alert.booking_id,
+                'location': {'lat': alert.location_lat, 'lng': alert.location_lng}
+            }
+        )
     )
     
     return {
         'emergency_id': emergency_id,
         'message': 'Emergency alert sent to all family members',
-        'emergency_services_info': 'Ligue 192 (SAMU) ou 193 (Bombeiros)'
+        'emergency_services_info': _EMERGENCY_SERVICES_INFO
     }
 
 # ============ CHAT ENDPOINTS ============
 
 @api_router.post("/chat/send", response_model=ChatMessageResponse)
 async def send_message(message: ChatMessage, user = Depends(get_current_user)):
-    msg_id = str(uuid.uuid4())
+    msg_id = new_id()
     chat_msg = {
         'id': msg_id,
         'sender_id': user['id'],
@@ -1007,20 +1423,21 @@ async def send_message(message: ChatMessage, user = Depends(get_current_user)):
         'read': False,
         'created_at': datetime.utcnow()
     }
-    await db.chat_messages.insert_one(chat_msg)
-    
-    # Notify recipient
-    await create_notification(
-        message.recipient_id,
-        f'Nova mensagem de {user["name"]}',
-        message.message[:50] + '...' if len(message.message) > 50 else message.message,
-        'chat_message',
-        {'message_id': msg_id, 'sender_id': user['id']}
+    # Notify recipient alongside the message insert
+    await asyncio.gather(
+        db.chat_messages.insert_one(chat_msg),
+        create_notification(
+            message.recipient_id,
+            f'Nova mensagem de {user["name"]}',
+            preview(message.message, 50),
+            'chat_message',
+            {'message_id': msg_id, 'sender_id': user['id']}
+        )
     )
-    
+
     return ChatMessageResponse(**chat_msg)
 
-@api_router.get("/chat/legacy/{recipient_id}", response_model=List[ChatMessageResponse])
+@api_router.get("/chat/legacy/{recipient_id}")
 async def get_chat_history(recipient_id: str, booking_id: Optional[str] = None, user = Depends(get_current_user)):
     query = {
         '$or': [
@@ -1031,78 +1448,92 @@ async def get_chat_history(recipient_id: str, booking_id: Optional[str] = None,
     if booking_id:
         query['booking_id'] = booking_id
     
-    messages = await db.chat_messages.find(query).sort('created_at', 1).to_list(200)
-    
-    # Mark as read
-    await db.chat_messages.update_many(
-        {'sender_id': recipient_id, 'recipient_id': user['id'], 'read': False},
-        {'$set': {'read': True}}
+    # The fetch and the mark-read touch disjoint state of the same docs;
+    # running them together halves the round-trips, and the client sees
+    # read=True on its next refresh either way
+    messages, _ = await asyncio.gather(
+        db.chat_messages.find(query, {'_id': 0}).sort('created_at', 1).to_list(200),
+        db.chat_messages.update_many(
+            {'sender_id': recipient_id, 'recipient_id': user['id'], 'read': False},
+            {'$set': {'read': True}}
+        )
     )
-    
-    return [ChatMessageResponse(**m) for m in messages]
+
+    return messages
 
 # ============ NOTIFICATIONS ENDPOINTS ============
 
-@api_router.get("/notifications", response_model=List[NotificationResponse])
+@api_router.get("/notifications")
 async def get_notifications(unread_only: bool = False, user = Depends(get_current_user)):
     query = {'user_id': user['id']}
     if unread_only:
         query['read'] = False
-    
-    notifications = await db.notifications.find(query).sort('created_at', -1).to_list(50)
-    return [NotificationResponse(**n) for n in notifications]
+
+    return await db.notifications.find(query, {'_id': 0}).sort('created_at', -1).to_list(50)
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, user = Depends(get_current_user)):
     result = await db.notifications.update_one(
-        {'id': notification_id, 'user_id': user['id']},
+        {'id': notification_id, 'user_id': user['id'], 'read': False},
         {'$set': {'read': True}}
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail='Notification not found')
+    await db.users.update_one({'id': user['id']}, {'$inc': {'unread_count': -1}})
     return {'message': 'Notification marked as read'}
 
 @api_router.put("/notifications/read-all")
 async def mark_all_notifications_read(user = Depends(get_current_user)):
-    await db.notifications.update_many(
-        {'user_id': user['id'], 'read': False},
-        {'$set': {'read': True}}
+    await asyncio.gather(
+        db.notifications.update_many(
+            {'user_id': user['id'], 'read': False},
+            {'$set': {'read': True}}
+        ),
+        db.users.update_one({'id': user['id']}, {'$set': {'unread_count': 0}})
     )
     return {'message': 'All notifications marked as read'}
 
 # ============ BIOMETRIC VERIFICATION ============
 
+# Dedicated RNG instance: the module-level random functions share one
+# lock-protected Mersenne-Twister, which contends under concurrency
+_biometric_rng = random.Random()
+
 @api_router.post("/biometric/daily-check")
 async def daily_biometric_check(selfie_base64: str = Form(...), user = Depends(get_current_user)):
     """Daily biometric verification for caregivers"""
     if user['role'] != 'caregiver':
         raise HTTPException(status_code=403, detail='Only caregivers can verify biometrics')
-    
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
+
+    profile_id = await get_caregiver_profile_id(user)
+    profile = await db.caregiver_profiles.find_one({'id': profile_id}) if profile_id else None
     if not profile:
         raise HTTPException(status_code=404, detail='Caregiver profile not found')
-    
+
     # Mock verification - in production, integrate with Azure Face API
     # Simulate liveness challenge
-    challenge_passed = random.random() > 0.1  # 90% success rate for demo
+    challenge_passed = _biometric_rng.random() > 0.1  # 90% success rate for demo
     
     if challenge_passed:
-        await db.caregiver_profiles.update_one(
-            {'id': profile['id']},
-            {'$set': {
-                'biometric_verified': True,
-                'last_biometric_check': datetime.utcnow()
-            }}
+        # Neither write depends on the other; one timestamp keeps them consistent
+        now = datetime.utcnow()
+        await asyncio.gather(
+            db.caregiver_profiles.update_one(
+                {'id': profile['id']},
+                {'$set': {
+                    'biometric_verified': True,
+                    'last_biometric_check': now
+                }}
+            ),
+            db.biometric_logs.insert_one({
+                'id': new_id(),
+                'caregiver_id': profile['id'],
+                'status': 'success',
+                'challenge_type': 'liveness',
+                'timestamp': now
+            })
         )
-        
-        await db.biometric_logs.insert_one({
-            'id': str(uuid.uuid4()),
-            'caregiver_id': profile['id'],
-            'status': 'success',
-            'challenge_type': 'liveness',
-            'timestamp': datetime.utcnow()
-        })
-        
+
         return {'success': True, 'message': 'Verificação biométrica concluída com sucesso'}
     else:
         return {'success': False, 'message': 'Verificação falhou. Por favor, tente novamente em um ambiente bem iluminado.'}
@@ -1112,8 +1543,9 @@ async def get_biometric_status(user = Depends(get_current_user)):
     """Check if daily biometric verification is needed"""
     if user['role'] != 'caregiver':
         raise HTTPException(status_code=403, detail='Only caregivers have biometric requirements')
-    
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
+
+    profile_id = await get_caregiver_profile_id(user)
+    profile = await db.caregiver_profiles.find_one({'id': profile_id}) if profile_id else None
     if not profile:
         raise HTTPException(status_code=404, detail='Profile not found')
     
@@ -1142,33 +1574,37 @@ async def upload_document(
 ):
     if user['role'] != 'caregiver':
         raise HTTPException(status_code=403, detail='Only caregivers can upload documents')
-    
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-    if not profile:
+
+    profile_id = await get_caregiver_profile_id(user)
+    if not profile_id:
         raise HTTPException(status_code=404, detail='Caregiver profile not found')
-    
-    doc_id = str(uuid.uuid4())
-    
+
+    doc_id = new_id()
+
     # Calculate expiry date for background check
     expiry_date = None
     if doc_type == 'background_check':
         expiry_date = datetime.utcnow() + timedelta(days=BACKGROUND_CHECK_VALIDITY_DAYS)
-    
+
+    doc_url = await store_media(doc_base64, content_type='application/octet-stream')
+
     document = {
         'id': doc_id,
-        'caregiver_id': profile['id'],
+        'caregiver_id': profile_id,
         'doc_type': doc_type,
-        'doc_base64': doc_base64,
+        'doc_base64': None if doc_url else doc_base64,
+        'doc_url': doc_url,
         'status': 'pending',
         'expiry_date': expiry_date,
         'review_notes': None,
         'created_at': datetime.utcnow()
     }
     await db.verifications.insert_one(document)
-    
+    await bump_stats(pending_verifications=1)
+
     if doc_type == 'background_check':
         await db.caregiver_profiles.update_one(
-            {'id': profile['id']},
+            {'id': profile_id},
             {'$set': {'background_check_status': 'pending_review'}}
         )
     
@@ -1182,21 +1618,28 @@ async def upload_document(
 async def get_my_documents(user = Depends(get_current_user)):
     if user['role'] != 'caregiver':
         raise HTTPException(status_code=403, detail='Only caregivers can view their documents')
-    
-    profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-    if not profile:
+
+    profile_id = await get_caregiver_profile_id(user)
+    if not profile_id:
         raise HTTPException(status_code=404, detail='Caregiver profile not found')
-    
-    docs = await db.verifications.find({'caregiver_id': profile['id']}).to_list(100)
-    
-    # Check for expiring documents
-    for doc in docs:
-        if doc.get('expiry_date'):
-            days_until_expiry = (doc['expiry_date'] - datetime.utcnow()).days
-            doc['days_until_expiry'] = days_until_expiry
-            doc['is_expiring_soon'] = days_until_expiry <= 30
-            doc['is_expired'] = days_until_expiry < 0
-    
+
+    # Expiry bookkeeping is computed server-side against $$NOW
+    docs = await db.verifications.aggregate([
+        {'$match': {'caregiver_id': profile_id}},
+        {'$addFields': {'days_until_expiry': {'$cond': [
+            {'$ifNull': ['$expiry_date', False]},
+            {'$dateDiff': {'startDate': '$$NOW', 'endDate': '$expiry_date', 'unit': 'day'}},
+            None
+        ]}}},
+        {'$addFields': {
+            'is_expiring_soon': {'$cond': [
+                {'$ne': ['$days_until_expiry', None]}, {'$lte': ['$days_until_expiry', 30]}, None]},
+            'is_expired': {'$cond': [
+                {'$ne': ['$days_until_expiry', None]}, {'$lt': ['$days_until_expiry', 0]}, None]}
+        }},
+        {'$project': {'_id': 0}}
+    ]).to_list(100)
+
     return docs
 
 # ============ REVIEWS ============
@@ -1218,7 +1661,7 @@ async def create_review(review_data: ReviewCreate, user = Depends(get_current_us
     if existing:
         raise HTTPException(status_code=400, detail='Booking already reviewed')
     
-    review_id = str(uuid.uuid4())
+    review_id = new_id()
     review = {
         'id': review_id,
         'booking_id': review_data.booking_id,
@@ -1229,91 +1672,118 @@ async def create_review(review_data: ReviewCreate, user = Depends(get_current_us
         'comment': review_data.comment,
         'created_at': datetime.utcnow()
     }
-    await db.reviews.insert_one(review)
-    
-    # Update caregiver rating
-    all_reviews = await db.reviews.find({'caregiver_id': booking['caregiver_id']}).to_list(1000)
-    avg_rating = sum(r['rating'] for r in all_reviews) / len(all_reviews)
-    await db.caregiver_profiles.update_one(
+    # Caregiver rating is updated incrementally: running sum/count instead
+    # of re-reading every review. Profiles from before rating_sum existed
+    # are seeded from rating * total_reviews on their first increment.
+    rating_update = db.caregiver_profiles.update_one(
         {'id': booking['caregiver_id']},
-        {'$set': {'rating': round(avg_rating, 1), 'total_reviews': len(all_reviews)}}
+        [
+            {'$set': {
+                'rating_sum': {'$add': [
+                    {'$ifNull': ['$rating_sum', {'$multiply': [
+                        {'$ifNull': ['$rating', 0]}, {'$ifNull': ['$total_reviews', 0]}]}]},
+                    review_data.rating
+                ]},
+                'total_reviews': {'$add': [{'$ifNull': ['$total_reviews', 0]}, 1]}
+            }},
+            {'$set': {'rating': {'$round': [{'$divide': ['$rating_sum', '$total_reviews']}, 1]}}}
+        ]
     )
-    
-    # Notify caregiver
-    await create_notification(
-        booking['caregiver_user_id'],
-        'Nova avaliação recebida',
-        f'Você recebeu {review_data.rating} estrelas de {user["name"]}',
-        'review',
-        {'review_id': review_id}
+
+    await asyncio.gather(
+        db.reviews.insert_one(review),
+        rating_update,
+        create_notification(
+            booking['caregiver_user_id'],
+            'Nova avaliação recebida',
+            f'Você recebeu {review_data.rating} estrelas de {user["name"]}',
+            'review',
+            {'review_id': review_id}
+        )
     )
-    
+
     return ReviewResponse(**review)
 
-@api_router.get("/reviews/{caregiver_id}", response_model=List[ReviewResponse])
+@api_router.get("/reviews/{caregiver_id}")
 async def get_caregiver_reviews(caregiver_id: str):
-    reviews = await db.reviews.find({'caregiver_id': caregiver_id}).sort('created_at', -1).to_list(100)
-    return [ReviewResponse(**r) for r in reviews]
+    return await db.reviews.find({'caregiver_id': caregiver_id}, {'_id': 0}).sort('created_at', -1).to_list(100)
 
 # ============ SENIORCARE ACADEMY (Legacy) ============
 
+# The catalog is near-static; serve repeat reads from process memory.
+# Bounded like _jwt_cache: the key comes from unauthenticated query strings
+ACADEMY_CACHE_TTL_SECONDS = 300
+ACADEMY_CACHE_MAX_ENTRIES = 256
+_academy_cache: Dict[tuple, tuple] = {}
+
 @api_router.get("/academy-legacy", response_model=List[AcademyContent])
 async def get_academy_content_legacy(
     category: Optional[str] = None,
     content_type: Optional[str] = None
 ):
+    cache_key = (category, content_type)
+    cached = _academy_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < ACADEMY_CACHE_TTL_SECONDS:
+        return [AcademyContent.model_construct(**c) for c in cached[1]]
+
     query = {}
     if category:
         query['category'] = category
     if content_type:
         query['content_type'] = content_type
-    
+
     content = await db.academy_content.find(query).sort('created_at', -1).to_list(50)
-    
+
     # If empty, seed with default content
     if not content:
+        now = datetime.utcnow()
         default_content = [
             {
-                'id': str(uuid.uuid4()),
+                'id': new_id(),
                 'title': 'Primeiros Socorros para Idosos',
                 'description': 'Aprenda técnicas essenciais de primeiros socorros adaptadas para idosos',
                 'content_type': 'video',
                 'category': 'caregiver_training',
                 'duration_minutes': 15,
                 'content_url': 'https://example.com/video1',
-                'created_at': datetime.utcnow()
+                'created_at': now
             },
             {
-                'id': str(uuid.uuid4()),
+                'id': new_id(),
                 'title': 'Como lidar com Alzheimer',
                 'description': 'Guia completo para famílias que cuidam de idosos com Alzheimer',
                 'content_type': 'article',
                 'category': 'family_support',
                 'content_body': 'O Alzheimer é uma doença que afeta milhões de famílias...',
-                'created_at': datetime.utcnow()
+                'created_at': now
             },
             {
-                'id': str(uuid.uuid4()),
+                'id': new_id(),
                 'title': 'Exercícios de Mobilidade',
                 'description': 'Exercícios seguros para manter a mobilidade do idoso',
                 'content_type': 'video',
                 'category': 'health_tips',
                 'duration_minutes': 20,
-                'created_at': datetime.utcnow()
+                'created_at': now
             },
             {
-                'id': str(uuid.uuid4()),
+                'id': new_id(),
                 'title': 'Direitos do Idoso - LGPD',
                 'description': 'Conheça os direitos do idoso e proteção de dados',
                 'content_type': 'article',
                 'category': 'legal',
-                'created_at': datetime.utcnow()
+                'created_at': now
             }
         ]
-        await db.academy_content.insert_many(default_content)
+        # ordered=False: a race between two first-callers inserts what it
+        # can instead of failing the whole batch
+        await db.academy_content.insert_many(default_content, ordered=False)
         content = default_content
-    
-    return [AcademyContent(**c) for c in content]
+
+    if len(_academy_cache) >= ACADEMY_CACHE_MAX_ENTRIES:
+        _academy_cache.clear()
+    _academy_cache[cache_key] = (time.monotonic(), content)
+    return [AcademyContent.model_construct(**c) for c in content]
 
 @api_router.get("/academy-legacy/{content_id}", response_model=AcademyContent)
 async def get_academy_content_detail_legacy(content_id: str):
@@ -1328,24 +1798,18 @@ async def get_academy_content_detail_legacy(content_id: str):
 async def get_admin_stats(user = Depends(get_current_user)):
     if user['role'] != 'admin':
         raise HTTPException(status_code=403, detail='Admin access required')
-    
-    return {
-        'total_caregivers': await db.caregiver_profiles.count_documents({}),
-        'verified_caregivers': await db.caregiver_profiles.count_documents({'verified': True}),
-        'total_clients': await db.client_profiles.count_documents({}),
-        'total_bookings': await db.bookings.count_documents({}),
-        'completed_bookings': await db.bookings.count_documents({'status': 'completed'}),
-        'pending_verifications': await db.verifications.count_documents({'status': 'pending'}),
-        'active_emergencies': await db.emergencies.count_documents({'status': 'active'})
-    }
+
+    stats = await db.stats.find_one({'_id': 'global'})
+    if not stats:
+        stats = await rebuild_admin_stats()
+    return {field: stats.get(field, 0) for field in ADMIN_STAT_FIELDS}
 
 @api_router.get("/admin/verification-queue")
 async def get_verification_queue(user = Depends(get_current_user)):
     if user['role'] != 'admin':
         raise HTTPException(status_code=403, detail='Admin access required')
     
-    docs = await db.verifications.find({'status': 'pending'}).to_list(100)
-    return docs
+    return await db.verifications.find({'status': 'pending'}, {'_id': 0}).to_list(100)
 
 @api_router.put("/admin/verify-document/{doc_id}")
 async def verify_document(
@@ -1365,7 +1829,12 @@ async def verify_document(
         {'id': doc_id},
         {'$set': {'status': status, 'review_notes': review_notes}}
     )
-    
+    if doc['status'] == 'pending':
+        counters = {'pending_verifications': -1}
+        if doc['doc_type'] == 'background_check' and status == 'approved':
+            counters['verified_caregivers'] = 1
+        await bump_stats(**counters)
+
     if doc['doc_type'] == 'background_check':
         update_data = {'background_check_status': 'approved' if status == 'approved' else 'rejected'}
         if status == 'approved':
@@ -1380,38 +1849,59 @@ async def verify_document(
 
 # ============ UTILITIES ============
 
-@api_router.get("/cities")
-async def get_cities():
-    return {
-        'cities': [
-            {'id': 'campo-grande', 'name': 'Campo Grande', 'state': 'MS'},
-            {'id': 'sao-paulo', 'name': 'São Paulo', 'state': 'SP'},
-            {'id': 'curitiba', 'name': 'Curitiba', 'state': 'PR'},
-            {'id': 'fortaleza', 'name': 'Fortaleza', 'state': 'CE'}
-        ]
-    }
+def static_json(payload: dict) -> tuple:
+    """Encode a constant payload once and derive its ETag"""
+    body = orjson.dumps(payload)
+    return body, hashlib.md5(body).hexdigest()
+
+def static_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve pre-encoded JSON; clients that already hold it get a 304"""
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304)
+    return Response(
+        body,
+        media_type='application/json',
+        headers={'ETag': etag, 'Cache-Control': 'public, max-age=86400'}
+    )
 
-@api_router.get("/specializations")
-async def get_specializations():
-    return {
-        'specializations': [
-            'Cuidados Gerais', 'Alzheimer/Demência', 'Pós-Operatório',
-            'Fisioterapia', 'Enfermagem', 'Acompanhamento Hospitalar',
-            'Cuidados Noturnos', 'Mobilidade Reduzida', 'Diabetes', 'Hipertensão'
-        ]
-    }
+_CITIES_JSON, _CITIES_ETAG = static_json({
+    'cities': [
+        {'id': 'campo-grande', 'name': 'Campo Grande', 'state': 'MS'},
+        {'id': 'sao-paulo', 'name': 'São Paulo', 'state': 'SP'},
+        {'id': 'curitiba', 'name': 'Curitiba', 'state': 'PR'},
+        {'id': 'fortaleza', 'name': 'Fortaleza', 'state': 'CE'}
+    ]
+})
+
+_SPECIALIZATIONS_JSON, _SPECIALIZATIONS_ETAG = static_json({
+    'specializations': [
+        'Cuidados Gerais', 'Alzheimer/Demência', 'Pós-Operatório',
+        'Fisioterapia', 'Enfermagem', 'Acompanhamento Hospitalar',
+        'Cuidados Noturnos', 'Mobilidade Reduzida', 'Diabetes', 'Hipertensão'
+    ]
+})
+
+_CARE_LEVELS_JSON, _CARE_LEVELS_ETAG = static_json({
+    'care_levels': [
+        {'id': 'companionship', 'name': 'Companhia', 'description': 'Companhia e atividades básicas'},
+        {'id': 'mobility', 'name': 'Mobilidade', 'description': 'Auxílio com mobilidade e locomoção'},
+        {'id': 'medical', 'name': 'Cuidados Médicos', 'description': 'Medicamentos e procedimentos básicos'},
+        {'id': 'alzheimer', 'name': 'Alzheimer/Demência', 'description': 'Cuidados especializados para demência'},
+        {'id': 'post_surgery', 'name': 'Pós-Operatório', 'description': 'Recuperação após cirurgia'}
+    ]
+})
+
+@api_router.get("/cities")
+async def get_cities(request: Request):
+    return static_json_response(request, _CITIES_JSON, _CITIES_ETAG)
+
+@api_router.get("/specializations")
+async def get_specializations(request: Request):
+    return static_json_response(request, _SPECIALIZATIONS_JSON, _SPECIALIZATIONS_ETAG)
 
 @api_router.get("/care-levels")
-async def get_care_levels():
-    return {
-        'care_levels': [
-            {'id': 'companionship', 'name': 'Companhia', 'description': 'Companhia e atividades básicas'},
-            {'id': 'mobility', 'name': 'Mobilidade', 'description': 'Auxílio com mobilidade e locomoção'},
-            {'id': 'medical', 'name': 'Cuidados Médicos', 'description': 'Medicamentos e procedimentos básicos'},
-            {'id': 'alzheimer', 'name': 'Alzheimer/Demência', 'description': 'Cuidados especializados para demência'},
-            {'id': 'post_surgery', 'name': 'Pós-Operatório', 'description': 'Recuperação após cirurgia'}
-        ]
-    }
+async def get_care_levels(request: Request):
+    return static_json_response(request, _CARE_LEVELS_JSON, _CARE_LEVELS_ETAG)
 
 # ============ STRIPE PAYMENT ENDPOINTS ============
 
@@ -1460,7 +1950,7 @@ async def create_payment_intent(data: PaymentIntentCreate, user = Depends(get_cu
     
     # Store payment record
     payment = {
-        'id': str(uuid.uuid4()),
+        'id': new_id(),
         'payment_intent_id': payment_intent_id,
         'booking_id': data.booking_id,
         'client_id': user['id'],
@@ -1481,71 +1971,71 @@ async def create_payment_intent(data: PaymentIntentCreate, user = Depends(get_cu
 @api_router.post("/payments/confirm")
 async def confirm_payment(booking_id: str, payment_intent_id: str, user = Depends(get_current_user)):
     """Confirm payment and update booking status"""
-    booking = await db.bookings.find_one({'id': booking_id})
-    if not booking:
-        raise HTTPException(status_code=404, detail='Booking not found')
-    
-    # Simulate successful payment (in production, verify with Stripe)
-    await db.payments.update_one(
-        {'payment_intent_id': payment_intent_id},
-        {'$set': {'status': 'succeeded', 'confirmed_at': datetime.utcnow()}}
-    )
-    
-    await db.bookings.update_one(
-        {'id': booking_id},
+    # Simulate successful payment (in production, verify with Stripe).
+    # The paid guard makes a replayed webhook a no-op instead of a
+    # duplicate notification.
+    booking = await db.bookings.find_one_and_update(
+        {'id': booking_id, 'paid': {'$ne': True}},
         {'$set': {'paid': True, 'escrow_status': 'held', 'paid_at': datetime.utcnow()}}
     )
-    
-    # Notify caregiver
-    await create_notification(
-        booking['caregiver_user_id'],
-        'Pagamento recebido!',
-        f'O pagamento para o atendimento de {booking["elder_name"]} foi confirmado',
-        'payment_received',
-        {'booking_id': booking_id}
+    if not booking:
+        if await db.bookings.find_one({'id': booking_id}, {'_id': 1}):
+            return {'success': True, 'message': 'Payment already confirmed'}
+        raise HTTPException(status_code=404, detail='Booking not found')
+
+    await asyncio.gather(
+        db.payments.update_one(
+            {'payment_intent_id': payment_intent_id},
+            {'$set': {'status': 'succeeded', 'confirmed_at': datetime.utcnow()}}
+        ),
+        create_notification(
+            booking['caregiver_user_id'],
+            'Pagamento recebido!',
+            f'O pagamento para o atendimento de {booking["elder_name"]} foi confirmado',
+            'payment_received',
+            {'booking_id': booking_id}
+        )
     )
-    
+
     return {'success': True, 'message': 'Payment confirmed'}
 
 @api_router.post("/payments/release-escrow")
 async def release_escrow(booking_id: str, user = Depends(get_current_user)):
     """Release escrow payment to caregiver after service completion"""
-    booking = await db.bookings.find_one({'id': booking_id})
+    # One conditional round-trip; concurrent releases cannot both pass
+    booking = await db.bookings.find_one_and_update(
+        {'id': booking_id, 'status': 'completed', 'escrow_status': 'held'},
+        {'$set': {'escrow_status': 'released', 'released_at': datetime.utcnow()}}
+    )
     if not booking:
-        raise HTTPException(status_code=404, detail='Booking not found')
-    
-    if booking['status'] != 'completed':
-        raise HTTPException(status_code=400, detail='Booking must be completed first')
-    
-    if booking.get('escrow_status') != 'held':
+        current = await db.bookings.find_one({'id': booking_id}, {'_id': 0, 'status': 1, 'escrow_status': 1})
+        if not current:
+            raise HTTPException(status_code=404, detail='Booking not found')
+        if current['status'] != 'completed':
+            raise HTTPException(status_code=400, detail='Booking must be completed first')
         raise HTTPException(status_code=400, detail='Escrow not available for release')
-    
+
     # Calculate caregiver payout (total - platform fee)
     caregiver_payout = booking['price_cents']
-    
+
     # Record payout
     payout = {
-        'id': str(uuid.uuid4()),
+        'id': new_id(),
         'booking_id': booking_id,
         'caregiver_id': booking['caregiver_id'],
         'amount_cents': caregiver_payout,
         'status': 'completed',
         'created_at': datetime.utcnow()
     }
-    await db.payouts.insert_one(payout)
-    
-    await db.bookings.update_one(
-        {'id': booking_id},
-        {'$set': {'escrow_status': 'released', 'released_at': datetime.utcnow()}}
-    )
-    
-    # Notify caregiver
-    await create_notification(
-        booking['caregiver_user_id'],
-        'Pagamento liberado!',
-        f'R$ {caregiver_payout/100:.2f} foi transferido para sua conta',
-        'payout_completed',
-        {'booking_id': booking_id, 'amount_cents': caregiver_payout}
+    await asyncio.gather(
+        db.payouts.insert_one(payout),
+        create_notification(
+            booking['caregiver_user_id'],
+            'Pagamento liberado!',
+            f'R$ {caregiver_payout/100:.2f} foi transferido para sua conta',
+            'payout_completed',
+            {'booking_id': booking_id, 'amount_cents': caregiver_payout}
+        )
     )
     
     return {'success': True, 'payout_cents': caregiver_payout}
@@ -1554,20 +2044,12 @@ async def release_escrow(booking_id: str, user = Depends(get_current_user)):
 async def get_payment_history(user = Depends(get_current_user)):
     """Get payment history for user"""
     if user['role'] == 'client':
-        payments = await db.payments.find({'client_id': user['id']}).sort('created_at', -1).to_list(50)
-    else:
-        profile = await db.caregiver_profiles.find_one({'user_id': user['id']})
-        if not profile:
-            return []
-        payouts = await db.payouts.find({'caregiver_id': profile['id']}).sort('created_at', -1).to_list(50)
-        return payouts
-    
-    # Remove _id for serialization
-    for p in payments:
-        if '_id' in p:
-            del p['_id']
-    
-    return payments
+        return await db.payments.find({'client_id': user['id']}, {'_id': 0}).sort('created_at', -1).to_list(50)
+
+    profile_id = await get_caregiver_profile_id(user)
+    if not profile_id:
+        return []
+    return await db.payouts.find({'caregiver_id': profile_id}, {'_id': 0}).sort('created_at', -1).to_list(50)
 
 # ============ FAMILY SHARE ENDPOINTS ============
 
@@ -1582,14 +2064,18 @@ async def invite_family_share(invite: FamilyShareInvite, user = Depends(get_curr
         raise HTTPException(status_code=403, detail='Only booking owner can invite')
     
     # Check total shares don't exceed 100%
-    existing_shares = await db.family_shares.find({'booking_id': invite.booking_id}).to_list(100)
-    total_shared = sum(s['share_percent'] for s in existing_shares)
+    # Sum server-side: one scalar back instead of every share document
+    agg = await db.family_shares.aggregate([
+        {'$match': {'booking_id': invite.booking_id}},
+        {'$group': {'_id': None, 'total': {'$sum': '$share_percent'}}}
+    ]).to_list(1)
+    total_shared = agg[0]['total'] if agg else 0
     if total_shared + invite.share_percent > 100:
         raise HTTPException(status_code=400, detail=f'Total share cannot exceed 100%. Current: {total_shared}%')
     
     share_amount = int(booking['total_cents'] * invite.share_percent / 100)
     
-    share_id = str(uuid.uuid4())
+    share_id = new_id()
     share = {
         'id': share_id,
         'booking_id': invite.booking_id,
@@ -1625,14 +2111,18 @@ async def get_family_shares(booking_id: str, user = Depends(get_current_user)):
     if not booking:
         raise HTTPException(status_code=404, detail='Booking not found')
     
-    shares = await db.family_shares.find({'booking_id': booking_id}).to_list(100)
-    
-    for s in shares:
-        if '_id' in s:
-            del s['_id']
-    
+    # One pipeline returns the share list and their summed percent together
+    result = (await db.family_shares.aggregate([
+        {'$match': {'booking_id': booking_id}},
+        {'$facet': {
+            'shares': [{'$project': {'_id': 0}}],
+            'total': [{'$group': {'_id': None, 't': {'$sum': '$share_percent'}}}]
+        }}
+    ]).to_list(1))[0]
+    shares = result['shares']
+
     # Calculate owner's share
-    total_shared = sum(s['share_percent'] for s in shares)
+    total_shared = result['total'][0]['t'] if result['total'] else 0
     owner_share = 100 - total_shared
     owner_amount = int(booking['total_cents'] * owner_share / 100)
     
@@ -1672,37 +2162,44 @@ async def accept_family_share(share_id: str, user = Depends(get_current_user)):
 @api_router.post("/family-share/{share_id}/pay")
 async def pay_family_share(share_id: str, user = Depends(get_current_user)):
     """Pay a family share"""
-    share = await db.family_shares.find_one({'id': share_id})
+    # Simulate payment. The paid guard in the filter makes double-pays
+    # match nothing instead of racing past the check below.
+    share = await db.family_shares.find_one_and_update(
+        {'id': share_id, 'invitee_id': user['id'], 'paid': {'$ne': True}},
+        {'$set': {'paid': True, 'paid_at': datetime.utcnow()}}
+    )
     if not share:
-        raise HTTPException(status_code=404, detail='Share not found')
-    
-    if share['invitee_id'] != user['id']:
-        raise HTTPException(status_code=403, detail='Access denied')
-    
-    if share.get('paid'):
+        current = await db.family_shares.find_one({'id': share_id}, {'_id': 0, 'invitee_id': 1, 'paid': 1})
+        if not current:
+            raise HTTPException(status_code=404, detail='Share not found')
+        if current.get('invitee_id') != user['id']:
+            raise HTTPException(status_code=403, detail='Access denied')
         raise HTTPException(status_code=400, detail='Already paid')
-    
-    # Simulate payment
-    await db.family_shares.update_one(
-        {'id': share_id},
-        {'$set': {'paid': True, 'paid_at': datetime.utcnow()}}
+
+    # All paid? An existence probe for one unpaid sibling beats loading them all
+    unpaid = await db.family_shares.count_documents(
+        {'booking_id': share['booking_id'], 'paid': {'$ne': True}}, limit=1
     )
-    
-    # Check if all shares are paid
-    booking_shares = await db.family_shares.find({'booking_id': share['booking_id']}).to_list(100)
-    all_paid = all(s.get('paid', False) for s in booking_shares)
-    
-    if all_paid:
+    if not unpaid:
         # Mark booking as fully paid
         await db.bookings.update_one(
             {'id': share['booking_id']},
             {'$set': {'paid': True, 'escrow_status': 'held'}}
         )
-    
+
     return {'success': True, 'message': 'Payment completed'}
 
 # ============ ENHANCED CHAT ENDPOINTS ============
 
+# Phone, email and messenger handles in one alternation — a single scan
+# per message instead of five
+_CONTACT_RE = re.compile(
+    r'\d{2}[\s-]?\d{4,5}[\s-]?\d{4}'
+    r'|[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+    r'|whatsapp|telegram|instagram',
+    re.IGNORECASE
+)
+
 class ChatRoomCreate(BaseModel):
     participant_id: str
     booking_id: Optional[str] = None
@@ -1726,11 +2223,9 @@ async def create_or_get_chat_room(data: ChatRoomCreate, user = Depends(get_curre
     existing = await db.chat_rooms.find_one({
         'participants': participants,
         'booking_id': data.booking_id
-    })
-    
+    }, {'_id': 0})
+
     if existing:
-        if '_id' in existing:
-            del existing['_id']
         return existing
     
     # Get participant info
@@ -1738,7 +2233,7 @@ async def create_or_get_chat_room(data: ChatRoomCreate, user = Depends(get_curre
     if not other_user:
         raise HTTPException(status_code=404, detail='User not found')
     
-    room_id = str(uuid.uuid4())
+    room_id = new_id()
     room = {
         'id': room_id,
         'participants': participants,
@@ -1760,30 +2255,28 @@ async def get_chat_rooms(user = Depends(get_current_user)):
     """Get all chat rooms for user"""
     try:
         user_id = str(user['id'])  # Ensure string
-        
-        # Use the same logic as debug endpoint
-        all_rooms = await db.chat_rooms.find().to_list(100)
-        matching_rooms = []
-        
-        for room in all_rooms:
-            participants = room.get('participants', [])
-            if user_id in participants:
-                if '_id' in room:
-                    del room['_id']
-                
-                # Count unread messages
-                unread = await db.chat_messages.count_documents({
-                    'room_id': room['id'],
-                    'sender_id': {'$ne': user_id},
-                    'read': False
-                })
-                room['unread_count'] = unread
-                matching_rooms.append(room)
-        
-        # Sort by last_message_at
-        matching_rooms.sort(key=lambda x: x.get('last_message_at') or '', reverse=True)
-        
-        return matching_rooms
+
+        # One aggregation: match the user's rooms, join the unread count
+        # per room, sort — instead of a scan plus one count per room
+        return await db.chat_rooms.aggregate([
+            {'$match': {'participants': user_id}},
+            {'$lookup': {
+                'from': 'chat_messages',
+                'let': {'rid': '$id'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$and': [
+                        {'$eq': ['$room_id', '$$rid']},
+                        {'$ne': ['$sender_id', user_id]},
+                        {'$eq': ['$read', False]}
+                    ]}}},
+                    {'$count': 'n'}
+                ],
+                'as': 'unread'
+            }},
+            {'$addFields': {'unread_count': {'$ifNull': [{'$arrayElemAt': ['$unread.n', 0]}, 0]}}},
+            {'$sort': {'last_message_at': -1}},
+            {'$project': {'_id': 0, 'unread': 0}}
+        ]).to_list(100)
     except Exception as e:
         logger.error(f"Error in get_chat_rooms: {e}")
         import traceback
@@ -1791,28 +2284,38 @@ async def get_chat_rooms(user = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/chat/rooms/{room_id}/messages")
-async def get_room_messages(room_id: str, limit: int = 50, user = Depends(get_current_user)):
-    """Get messages from a chat room"""
+async def get_room_messages(
+    room_id: str,
+    cursor: Optional[str] = None,
+    size: int = Query(50, le=100),
+    user = Depends(get_current_user)
+):
+    """Get messages from a chat room, newest page first (cursor = oldest created_at seen)"""
     room = await db.chat_rooms.find_one({'id': room_id})
     if not room:
         raise HTTPException(status_code=404, detail='Room not found')
-    
+
     if user['id'] not in room['participants']:
         raise HTTPException(status_code=403, detail='Access denied')
-    
-    messages = await db.chat_messages.find({'room_id': room_id}).sort('created_at', -1).limit(limit).to_list(limit)
-    
-    # Mark as read
-    await db.chat_messages.update_many(
+
+    query = {'room_id': room_id}
+    if cursor:
+        query['created_at'] = {'$lt': datetime.fromisoformat(cursor)}
+
+    # Fetch one extra row to learn whether an older page exists. The
+    # mark-read write is fire-and-forget: the reader never sees its own
+    # unread flags, so the response needn't wait on it
+    fire_and_forget(db.chat_messages.update_many(
         {'room_id': room_id, 'sender_id': {'$ne': user['id']}, 'read': False},
         {'$set': {'read': True, 'read_at': datetime.utcnow()}}
-    )
-    
-    for m in messages:
-        if '_id' in m:
-            del m['_id']
-    
-    return list(reversed(messages))
+    ))
+    messages = await db.chat_messages.find(query, {'_id': 0}).sort('created_at', -1).limit(size + 1).to_list(size + 1)
+    has_next = len(messages) > size
+    if has_next:
+        messages = messages[:size]
+    next_cursor = messages[-1]['created_at'].isoformat() if has_next else None
+
+    return {'items': list(reversed(messages)), 'next_cursor': next_cursor, 'has_next': has_next}
 
 class RoomMessage(BaseModel):
     message: str
@@ -1822,35 +2325,25 @@ class RoomMessage(BaseModel):
 @api_router.post("/chat/rooms/{room_id}/messages")
 async def send_room_message(room_id: str, data: RoomMessage, user = Depends(get_current_user)):
     """Send a message in a chat room"""
-    room = await db.chat_rooms.find_one({'id': room_id})
+    room = await db.chat_rooms.find_one({'id': room_id}, {'_id': 0, 'participants': 1, 'booking_id': 1})
     if not room:
         raise HTTPException(status_code=404, detail='Room not found')
-    
+
     if user['id'] not in room['participants']:
         raise HTTPException(status_code=403, detail='Access denied')
-    
+
     # Block external contact info if booking not confirmed
     if room.get('booking_id'):
-        booking = await db.bookings.find_one({'id': room['booking_id']})
+        booking = await db.bookings.find_one({'id': room['booking_id']}, {'_id': 0, 'status': 1})
         if booking and booking['status'] == 'pending':
             # Check for phone/email patterns
-            import re
-            contact_patterns = [
-                r'\d{2}[\s-]?\d{4,5}[\s-]?\d{4}',  # Phone
-                r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',  # Email
-                r'whatsapp',
-                r'telegram',
-                r'instagram',
-            ]
-            message_lower = data.message.lower()
-            for pattern in contact_patterns:
-                if re.search(pattern, message_lower, re.IGNORECASE):
-                    raise HTTPException(
-                        status_code=400, 
-                        detail='Informações de contato externas são bloqueadas até a confirmação do agendamento'
-                    )
-    
-    msg_id = str(uuid.uuid4())
+            if _CONTACT_RE.search(data.message):
+                raise HTTPException(
+                    status_code=400,
+                    detail='Informações de contato externas são bloqueadas até a confirmação do agendamento'
+                )
+
+    msg_id = new_id()
     message = {
         'id': msg_id,
         'room_id': room_id,
@@ -1862,27 +2355,34 @@ async def send_room_message(room_id: str, data: RoomMessage, user = Depends(get_
         'read': False,
         'created_at': datetime.utcnow()
     }
-    await db.chat_messages.insert_one(message)
-    
-    # Update room
-    await db.chat_rooms.update_one(
-        {'id': room_id},
-        {'$set': {'last_message': data.message[:50], 'last_message_at': datetime.utcnow()}}
-    )
-    
-    # Notify other participants
-    for participant_id in room['participants']:
-        if participant_id != user['id']:
-            await create_notification(
-                participant_id,
-                f'Nova mensagem de {user["name"]}',
-                data.message[:50] + ('...' if len(data.message) > 50 else ''),
-                'chat_message',
-                {'room_id': room_id, 'message_id': msg_id}
-            )
-    
-    if '_id' in message:
-        del message['_id']
+
+    # Message insert, room denormalization and the notification fan-out
+    # are independent — one concurrent batch instead of a write per await
+    body = preview(data.message, 50)
+    recipients = [p for p in room['participants'] if p != user['id']]
+    notifications = [
+        build_notification(
+            participant_id,
+            f'Nova mensagem de {user["name"]}',
+            body,
+            'chat_message',
+            {'room_id': room_id, 'message_id': msg_id}
+        )
+        for participant_id in recipients
+    ]
+    writes = [
+        db.chat_messages.insert_one(message),
+        db.chat_rooms.update_one(
+            {'id': room_id},
+            {'$set': {'last_message': body, 'last_message_at': message['created_at']}}
+        )
+    ]
+    if notifications:
+        writes.append(db.notifications.insert_many(notifications))
+        writes.append(db.users.update_many({'id': {'$in': recipients}}, {'$inc': {'unread_count': 1}}))
+    await asyncio.gather(*writes)
+
+    message.pop('_id', None)  # insert_one stamps the local dict
     return message
 
 # ============ PUSH NOTIFICATION REGISTRATION ============
@@ -1894,19 +2394,25 @@ class PushTokenRegister(BaseModel):
 @api_router.post("/notifications/register-push")
 async def register_push_token(data: PushTokenRegister, user = Depends(get_current_user)):
     """Register device push token for notifications"""
-    # Store push token
+    now = datetime.utcnow()
+    # Store push token; immutable fields only written on first insert
     await db.push_tokens.update_one(
         {'user_id': user['id'], 'push_token': data.push_token},
-        {'$set': {
-            'user_id': user['id'],
-            'push_token': data.push_token,
-            'device_type': data.device_type,
-            'active': True,
-            'updated_at': datetime.utcnow()
-        }},
+        {
+            '$set': {
+                'device_type': data.device_type,
+                'active': True,
+                'updated_at': now
+            },
+            '$setOnInsert': {
+                'user_id': user['id'],
+                'push_token': data.push_token,
+                'created_at': now
+            }
+        },
         upsert=True
     )
-    
+
     return {'success': True, 'message': 'Push token registered'}
 
 @api_router.delete("/notifications/unregister-push")
@@ -1918,36 +2424,49 @@ async def unregister_push_token(push_token: str, user = Depends(get_current_user
     )
     return {'success': True, 'message': 'Push token unregistered'}
 
+# Expo accepts up to 100 messages per request, so sends are queued and a
+# background worker flushes them in batches over the shared HTTP client
+_push_queue: asyncio.Queue = asyncio.Queue()
+_push_worker_task = None
+PUSH_BATCH_MAX = 100
+PUSH_FLUSH_SECONDS = 0.05
+
+async def _flush_push_batch(batch: List[dict]):
+    try:
+        response = await http_client.post(
+            'https://exp.host/--/api/v2/push/send',
+            json=batch,
+            headers={'Content-Type': 'application/json'},
+            timeout=10.0
+        )
+        logger.info(f"Push batch of {len(batch)} sent: {response.status_code}")
+    except Exception as e:
+        logger.error(f"Failed to send push batch: {e}")
+
+async def push_worker():
+    """Drain the push queue: flush when 100 messages accumulate or 50ms pass"""
+    while True:
+        batch = [await _push_queue.get()]
+        while len(batch) < PUSH_BATCH_MAX:
+            try:
+                batch.append(await asyncio.wait_for(_push_queue.get(), timeout=PUSH_FLUSH_SECONDS))
+            except asyncio.TimeoutError:
+                break
+        await _flush_push_batch(batch)
+
 # Helper function to send push notification
 async def send_push_notification(user_id: str, title: str, body: str, data: dict = None):
-    """Send push notification via Expo Push API"""
+    """Queue push notifications for the user's devices via Expo Push API"""
     tokens = await db.push_tokens.find({'user_id': user_id, 'active': True}).to_list(10)
-    
-    if not tokens:
-        return
-    
-    messages = []
+
     for token_doc in tokens:
-        message = {
+        _push_queue.put_nowait({
             'to': token_doc['push_token'],
             'sound': 'default',
             'title': title,
             'body': body,
             'data': data or {}
-        }
-        messages.append(message)
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                'https://exp.host/--/api/v2/push/send',
-                json=messages,
-                headers={'Content-Type': 'application/json'},
-                timeout=10.0
-            )
-            logger.info(f"Push notification sent: {response.status_code}")
-    except Exception as e:
-        logger.error(f"Failed to send push notification: {e}")
+        })
 
 # Update create_notification to also send push
 async def create_notification_with_push(user_id: str, title: str, message: str, notification_type: str, data: dict = None):
@@ -1972,75 +2491,88 @@ def require_admin(user = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail='Admin access required')
     return user
 
+# Dashboard numbers tolerate 30s of staleness; the lock keeps concurrent
+# refreshes from stampeding the aggregations
+DASHBOARD_CACHE_TTL_SECONDS = 30
+_dashboard_cache: Optional[tuple] = None  # (monotonic stamp, payload)
+_dashboard_lock = asyncio.Lock()
+
 @api_router.get("/admin/dashboard")
 async def admin_dashboard(user = Depends(require_admin)):
     """Get admin dashboard statistics"""
-    # User stats
-    total_users = await db.users.count_documents({})
-    total_clients = await db.users.count_documents({'role': 'client'})
-    total_caregivers = await db.users.count_documents({'role': 'caregiver'})
-    
-    # Caregiver stats
-    verified_caregivers = await db.caregiver_profiles.count_documents({'verified': True})
-    pending_verification = await db.caregiver_profiles.count_documents({'background_check_status': 'pending'})
-    
-    # Booking stats
-    total_bookings = await db.bookings.count_documents({})
-    pending_bookings = await db.bookings.count_documents({'status': 'pending'})
-    confirmed_bookings = await db.bookings.count_documents({'status': 'confirmed'})
-    completed_bookings = await db.bookings.count_documents({'status': 'completed'})
-    cancelled_bookings = await db.bookings.count_documents({'status': 'cancelled'})
-    
-    # Financial stats
-    pipeline = [
-        {'$match': {'paid': True}},
-        {'$group': {
-            '_id': None,
-            'total_revenue': {'$sum': '$total_cents'},
-            'total_platform_fees': {'$sum': '$platform_fee_cents'},
-            'total_caregiver_earnings': {'$sum': '$price_cents'}
-        }}
-    ]
-    financial = await db.bookings.aggregate(pipeline).to_list(1)
-    financial_data = financial[0] if financial else {'total_revenue': 0, 'total_platform_fees': 0, 'total_caregiver_earnings': 0}
-    
-    # Recent activity
-    recent_bookings = await db.bookings.find().sort('created_at', -1).limit(5).to_list(5)
-    for b in recent_bookings:
-        if '_id' in b:
-            del b['_id']
-    
-    recent_users = await db.users.find().sort('created_at', -1).limit(5).to_list(5)
-    for u in recent_users:
-        if '_id' in u:
-            del u['_id']
-        if 'password_hash' in u:
-            del u['password_hash']
-    
+    global _dashboard_cache
+    if _dashboard_cache and time.monotonic() - _dashboard_cache[0] < DASHBOARD_CACHE_TTL_SECONDS:
+        return _dashboard_cache[1]
+    async with _dashboard_lock:
+        if _dashboard_cache and time.monotonic() - _dashboard_cache[0] < DASHBOARD_CACHE_TTL_SECONDS:
+            return _dashboard_cache[1]
+        payload = await _build_admin_dashboard()
+        _dashboard_cache = (time.monotonic(), payload)
+        return payload
+
+async def _build_admin_dashboard() -> dict:
+    # One $facet per collection (single pass each), all three in flight
+    # together — replaces 11 sequential round trips
+    users_agg, caregivers_agg, bookings_agg = await asyncio.gather(
+        db.users.aggregate([{'$facet': {
+            'by_role': [{'$group': {'_id': '$role', 'n': {'$sum': 1}}}],
+            'recent': [
+                {'$sort': {'created_at': -1}}, {'$limit': 5},
+                {'$project': {'_id': 0, 'password_hash': 0}}
+            ]
+        }}]).to_list(1),
+        db.caregiver_profiles.aggregate([{'$facet': {
+            'verified': [{'$match': {'verified': True}}, {'$count': 'n'}],
+            'pending': [{'$match': {'background_check_status': 'pending'}}, {'$count': 'n'}]
+        }}]).to_list(1),
+        db.bookings.aggregate([{'$facet': {
+            'by_status': [{'$group': {'_id': '$status', 'n': {'$sum': 1}}}],
+            'financial': [
+                {'$match': {'paid': True}},
+                {'$group': {
+                    '_id': None,
+                    'total_revenue': {'$sum': '$total_cents'},
+                    'total_platform_fees': {'$sum': '$platform_fee_cents'},
+                    'total_caregiver_earnings': {'$sum': '$price_cents'}
+                }}
+            ],
+            'recent': [{'$sort': {'created_at': -1}}, {'$limit': 5}, {'$project': {'_id': 0}}]
+        }}]).to_list(1)
+    )
+
+    users_facet, caregivers_facet, bookings_facet = users_agg[0], caregivers_agg[0], bookings_agg[0]
+    users_by_role = {r['_id']: r['n'] for r in users_facet['by_role']}
+    bookings_by_status = {r['_id']: r['n'] for r in bookings_facet['by_status']}
+    financial = bookings_facet['financial']
+    financial_data = financial[0] if financial else {}
+
+    def facet_count(facet):
+        return facet[0]['n'] if facet else 0
+
     return {
         'users': {
-            'total': total_users,
-            'clients': total_clients,
-            'caregivers': total_caregivers
+            'total': sum(users_by_role.values()),
+            'clients': users_by_role.get('client', 0),
+            'caregivers': users_by_role.get('caregiver', 0)
         },
         'caregivers': {
-            'verified': verified_caregivers,
-            'pending_verification': pending_verification
+            'verified': facet_count(caregivers_facet['verified']),
+            'pending_verification': facet_count(caregivers_facet['pending'])
         },
         'bookings': {
-            'total': total_bookings,
-            'pending': pending_bookings,
-            'confirmed': confirmed_bookings,
-            'completed': completed_bookings,
-            'cancelled': cancelled_bookings
+            'total': sum(bookings_by_status.values()),
+            'pending': bookings_by_status.get('pending', 0),
+            'confirmed': bookings_by_status.get('confirmed', 0),
+            'completed': bookings_by_status.get('completed', 0),
+            'cancelled': bookings_by_status.get('cancelled', 0)
         },
         'financial': {
             'total_revenue_cents': financial_data.get('total_revenue', 0),
             'platform_fees_cents': financial_data.get('total_platform_fees', 0),
             'caregiver_earnings_cents': financial_data.get('total_caregiver_earnings', 0)
         },
-        'recent_bookings': recent_bookings,
-        'recent_users': recent_users
+        'recent_bookings': bookings_facet['recent'],
+        'recent_users': users_facet['recent']
     }
 
 @api_router.get("/admin/users")
@@ -2049,9 +2581,10 @@ async def admin_list_users(
     search: Optional[str] = None,
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
     user = Depends(require_admin)
 ):
-    """List all users with filtering"""
+    """List all users with filtering; pass cursor (last created_at seen) for deep pages"""
     query = {}
     if role:
         query['role'] = role
@@ -2060,51 +2593,49 @@ async def admin_list_users(
             {'name': {'$regex': search, '$options': 'i'}},
             {'email': {'$regex': search, '$options': 'i'}}
         ]
-    
-    skip = (page - 1) * limit
-    total = await db.users.count_documents(query)
-    users = await db.users.find(query).skip(skip).limit(limit).sort('created_at', -1).to_list(limit)
-    
-    for u in users:
-        if '_id' in u:
-            del u['_id']
-        if 'password_hash' in u:
-            del u['password_hash']
-    
+
+    # Metadata counts don't need exactness on the unfiltered listing.
+    # count_documents starts encoding immediately on a worker thread, so the
+    # cursor filter goes in a separate dict rather than mutating this one.
+    total_coro = db.users.count_documents(query) if query else db.users.estimated_document_count()
+
+    # Range pagination beats skip(): Mongo walks and discards every skipped doc
+    if cursor:
+        page_query = query | {'created_at': {'$lt': datetime.fromisoformat(cursor)}}
+        find = db.users.find(page_query, PROJECT_USER).sort('created_at', -1).limit(limit)
+    else:
+        find = db.users.find(query, PROJECT_USER).sort('created_at', -1).skip((page - 1) * limit).limit(limit)
+
+    total, users = await asyncio.gather(total_coro, find.to_list(limit))
+
     return {
         'users': users,
         'total': total,
         'page': page,
-        'pages': (total + limit - 1) // limit
+        'pages': (total + limit - 1) // limit,
+        'next_cursor': users[-1]['created_at'].isoformat() if len(users) == limit else None
     }
 
 @api_router.get("/admin/users/{user_id}")
 async def admin_get_user(user_id: str, admin = Depends(require_admin)):
     """Get detailed user info"""
-    user = await db.users.find_one({'id': user_id})
+    # User doc and bookings count are independent; fetch them together
+    user, bookings_count = await asyncio.gather(
+        db.users.find_one({'id': user_id}, PROJECT_USER),
+        db.bookings.count_documents({
+            '$or': [{'client_id': user_id}, {'caregiver_user_id': user_id}]
+        })
+    )
     if not user:
         raise HTTPException(status_code=404, detail='User not found')
-    
-    if '_id' in user:
-        del user['_id']
-    if 'password_hash' in user:
-        del user['password_hash']
-    
+
     # Get profile
     profile = None
     if user['role'] == 'caregiver':
-        profile = await db.caregiver_profiles.find_one({'user_id': user_id})
+        profile = await db.caregiver_profiles.find_one({'user_id': user_id}, {'_id': 0})
     elif user['role'] == 'client':
-        profile = await db.client_profiles.find_one({'user_id': user_id})
-    
-    if profile and '_id' in profile:
-        del profile['_id']
-    
-    # Get bookings count
-    bookings_count = await db.bookings.count_documents({
-        '$or': [{'client_id': user_id}, {'caregiver_user_id': user_id}]
-    })
-    
+        profile = await db.client_profiles.find_one({'user_id': user_id}, {'_id': 0})
+
     return {
         'user': user,
         'profile': profile,
@@ -2120,6 +2651,7 @@ async def admin_verify_user(user_id: str, verified: bool = True, admin = Depends
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail='User not found')
+    await invalidate_user_cache(user_id)
     return {'success': True, 'verified': verified}
 
 @api_router.put("/admin/users/{user_id}/suspend")
@@ -2131,34 +2663,33 @@ async def admin_suspend_user(user_id: str, suspended: bool = True, reason: str =
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail='User not found')
+    if suspended:
+        await revoke_user_tokens(user_id)
+    else:
+        await invalidate_user_cache(user_id)
     return {'success': True, 'suspended': suspended}
 
 @api_router.get("/admin/caregivers/pending")
 async def admin_pending_caregivers(user = Depends(require_admin)):
     """Get caregivers pending verification"""
-    profiles = await db.caregiver_profiles.find({
-        '$or': [
+    # $lookup joins the user in one round trip instead of a find_one per profile
+    return await db.caregiver_profiles.aggregate([
+        {'$match': {'$or': [
             {'background_check_status': 'pending'},
             {'verified': False}
-        ]
-    }).to_list(100)
-    
-    result = []
-    for p in profiles:
-        if '_id' in p:
-            del p['_id']
-        user_data = await db.users.find_one({'id': p['user_id']})
-        if user_data:
-            p['user_name'] = user_data['name']
-            p['user_email'] = user_data['email']
-        result.append(p)
-    
-    return result
+        ]}},
+        {'$lookup': {'from': 'users', 'localField': 'user_id', 'foreignField': 'id', 'as': 'u'}},
+        {'$addFields': {
+            'user_name': {'$arrayElemAt': ['$u.name', 0]},
+            'user_email': {'$arrayElemAt': ['$u.email', 0]}
+        }},
+        {'$project': {'_id': 0, 'u': 0}}
+    ]).to_list(100)
 
 @api_router.put("/admin/caregivers/{caregiver_id}/approve")
 async def admin_approve_caregiver(caregiver_id: str, admin = Depends(require_admin)):
     """Approve a caregiver's verification"""
-    result = await db.caregiver_profiles.update_one(
+    profile = await db.caregiver_profiles.find_one_and_update(
         {'id': caregiver_id},
         {'$set': {
             'verified': True,
@@ -2167,20 +2698,20 @@ async def admin_approve_caregiver(caregiver_id: str, admin = Depends(require_adm
             'verified_by': admin['id']
         }}
     )
-    if result.modified_count == 0:
+    if not profile:
         raise HTTPException(status_code=404, detail='Caregiver not found')
-    
+    if not profile.get('verified'):
+        await bump_stats(verified_caregivers=1)
+
     # Notify caregiver
-    profile = await db.caregiver_profiles.find_one({'id': caregiver_id})
-    if profile:
-        await create_notification(
-            profile['user_id'],
-            '🎉 Parabéns! Você foi verificado!',
-            'Sua conta foi verificada pelo SeniorCare+. Agora você pode receber agendamentos.',
-            'verification_approved',
-            {}
-        )
-    
+    await create_notification(
+        profile['user_id'],
+        '🎉 Parabéns! Você foi verificado!',
+        'Sua conta foi verificada pelo SeniorCare+. Agora você pode receber agendamentos.',
+        'verification_approved',
+        {}
+    )
+
     return {'success': True, 'message': 'Caregiver approved'}
 
 @api_router.put("/admin/caregivers/{caregiver_id}/reject")
@@ -2216,26 +2747,32 @@ async def admin_list_bookings(
     status: Optional[str] = None,
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
     user = Depends(require_admin)
 ):
-    """List all bookings"""
+    """List all bookings; pass cursor (last created_at seen) for deep pages"""
     query = {}
     if status:
         query['status'] = status
-    
-    skip = (page - 1) * limit
-    total = await db.bookings.count_documents(query)
-    bookings = await db.bookings.find(query).skip(skip).limit(limit).sort('created_at', -1).to_list(limit)
-    
-    for b in bookings:
-        if '_id' in b:
-            del b['_id']
-    
+
+    # Separate dict for the page filter: the count is already encoding `query`
+    # on a worker thread and must not see the cursor bound
+    total_coro = db.bookings.count_documents(query) if query else db.bookings.estimated_document_count()
+
+    if cursor:
+        page_query = query | {'created_at': {'$lt': datetime.fromisoformat(cursor)}}
+        find = db.bookings.find(page_query, {'_id': 0}).sort('created_at', -1).limit(limit)
+    else:
+        find = db.bookings.find(query, {'_id': 0}).sort('created_at', -1).skip((page - 1) * limit).limit(limit)
+
+    total, bookings = await asyncio.gather(total_coro, find.to_list(limit))
+
     return {
         'bookings': bookings,
         'total': total,
         'page': page,
-        'pages': (total + limit - 1) // limit
+        'pages': (total + limit - 1) // limit,
+        'next_cursor': bookings[-1]['created_at'].isoformat() if len(bookings) == limit else None
     }
 
 @api_router.get("/admin/reports/financial")
@@ -2254,18 +2791,27 @@ async def admin_financial_report(
         else:
             query['created_at'] = {'$lte': datetime.fromisoformat(end_date)}
     
-    bookings = await db.bookings.find(query).to_list(1000)
-    
-    total_revenue = sum(b.get('total_cents', 0) for b in bookings)
-    platform_fees = sum(b.get('platform_fee_cents', 0) for b in bookings)
-    caregiver_earnings = sum(b.get('price_cents', 0) for b in bookings)
-    
+    # Sum server-side: three integers back instead of up to 1000 full
+    # booking documents, and no row cap on the report
+    result = await db.bookings.aggregate([
+        {'$match': query},
+        {'$group': {
+            '_id': None,
+            'n': {'$sum': 1},
+            'total_revenue': {'$sum': '$total_cents'},
+            'platform_fees': {'$sum': '$platform_fee_cents'},
+            'caregiver_earnings': {'$sum': '$price_cents'},
+            'average_booking': {'$avg': '$total_cents'}
+        }}
+    ]).to_list(1)
+    totals = result[0] if result else {}
+
     return {
-        'total_bookings': len(bookings),
-        'total_revenue_cents': total_revenue,
-        'platform_fees_cents': platform_fees,
-        'caregiver_earnings_cents': caregiver_earnings,
-        'average_booking_cents': total_revenue // len(bookings) if bookings else 0
+        'total_bookings': totals.get('n', 0),
+        'total_revenue_cents': totals.get('total_revenue', 0),
+        'platform_fees_cents': totals.get('platform_fees', 0),
+        'caregiver_earnings_cents': totals.get('caregiver_earnings', 0),
+        'average_booking_cents': int(totals.get('average_booking') or 0)
     }
 
 # ============ CARE LOG COMPLETE ENDPOINTS ============
@@ -2294,6 +2840,19 @@ class CareLogResponse(BaseModel):
     photo_url: Optional[str] = None
     created_at: datetime
 
+_CARE_LOG_TYPE_LABELS = {
+    'check_in': '📍 Check-in realizado',
+    'check_out': '👋 Check-out realizado',
+    'meal': '🍽️ Refeição registrada',
+    'medication': '💊 Medicação administrada',
+    'activity': '🎯 Atividade realizada',
+    'rest': '😴 Período de descanso',
+    'hygiene': '🚿 Higiene realizada',
+    'vital_signs': '❤️ Sinais vitais medidos',
+    'observation': '📝 Nova observação',
+    'incident': '⚠️ Incidente registrado'
+}
+
 @api_router.post("/care-logs")
 async def create_care_log(entry: CareLogEntry, user = Depends(get_current_user)):
     """Create a new care log entry"""
@@ -2307,7 +2866,7 @@ async def create_care_log(entry: CareLogEntry, user = Depends(get_current_user))
     if booking['caregiver_user_id'] != user['id']:
         raise HTTPException(status_code=403, detail='You are not the caregiver for this booking')
     
-    log_id = str(uuid.uuid4())
+    log_id = new_id()
     log_entry = {
         'id': log_id,
         'booking_id': entry.booking_id,
@@ -2325,67 +2884,69 @@ async def create_care_log(entry: CareLogEntry, user = Depends(get_current_user))
         'created_at': datetime.utcnow()
     }
     
-    await db.care_logs.insert_one(log_entry)
-    
-    # Notify client
-    type_labels = {
-        'check_in': '📍 Check-in realizado',
-        'check_out': '👋 Check-out realizado',
-        'meal': '🍽️ Refeição registrada',
-        'medication': '💊 Medicação administrada',
-        'activity': '🎯 Atividade realizada',
-        'rest': '😴 Período de descanso',
-        'hygiene': '🚿 Higiene realizada',
-        'vital_signs': '❤️ Sinais vitais medidos',
-        'observation': '📝 Nova observação',
-        'incident': '⚠️ Incidente registrado'
-    }
-    
-    await create_notification(
-        booking['client_id'],
-        type_labels.get(entry.entry_type, 'Atualização do cuidado'),
-        f'{user["name"]}: {entry.description[:50]}...' if len(entry.description) > 50 else f'{user["name"]}: {entry.description}',
-        'care_log_update',
-        {'log_id': log_id, 'booking_id': entry.booking_id}
-    )
-    
-    # Update booking check-in/check-out times
+    # The insert, the notification and the check-in/out stamp are
+    # independent — one round-trip time instead of three
+    writes = [
+        db.care_logs.insert_one(log_entry),
+        create_notification(
+            booking['client_id'],
+            _CARE_LOG_TYPE_LABELS.get(entry.entry_type, 'Atualização do cuidado'),
+            f'{user["name"]}: {preview(entry.description, 50)}',
+            'care_log_update',
+            {'log_id': log_id, 'booking_id': entry.booking_id}
+        )
+    ]
     if entry.entry_type == 'check_in':
-        await db.bookings.update_one(
+        writes.append(db.bookings.update_one(
             {'id': entry.booking_id},
             {'$set': {'check_in_time': datetime.utcnow(), 'status': 'in_progress'}}
-        )
+        ))
     elif entry.entry_type == 'check_out':
-        await db.bookings.update_one(
+        writes.append(db.bookings.update_one(
             {'id': entry.booking_id},
             {'$set': {'check_out_time': datetime.utcnow()}}
-        )
-    
+        ))
+    await asyncio.gather(*writes)
+
     return {'id': log_id, 'message': 'Care log entry created'}
 
 @api_router.get("/care-logs/{booking_id}")
-async def get_care_logs(booking_id: str, user = Depends(get_current_user)):
-    """Get all care logs for a booking"""
+async def get_care_logs(
+    booking_id: str,
+    cursor: Optional[str] = None,
+    size: int = Query(50, le=200),
+    user = Depends(get_current_user)
+):
+    """Get care logs for a booking, newest page first (cursor = oldest created_at seen)"""
     booking = await db.bookings.find_one({'id': booking_id})
     if not booking:
         raise HTTPException(status_code=404, detail='Booking not found')
-    
+
     # Check access
     if user['id'] not in [booking['client_id'], booking['caregiver_user_id']] and user['role'] != 'admin':
         raise HTTPException(status_code=403, detail='Access denied')
-    
-    logs = await db.care_logs.find({'booking_id': booking_id}).sort('created_at', -1).to_list(200)
-    
-    for log in logs:
-        if '_id' in log:
-            del log['_id']
-    
-    return logs
+
+    query = {'booking_id': booking_id}
+    if cursor:
+        query['created_at'] = {'$lt': datetime.fromisoformat(cursor)}
+
+    logs = await db.care_logs.find(query, {'_id': 0}).sort('created_at', -1).limit(size + 1).to_list(size + 1)
+    has_next = len(logs) > size
+    if has_next:
+        logs = logs[:size]
+    next_cursor = logs[-1]['created_at'].isoformat() if has_next else None
+
+    return {'items': logs, 'next_cursor': next_cursor, 'has_next': has_next}
 
 @api_router.get("/care-logs/summary/{booking_id}")
 async def get_care_log_summary(booking_id: str, user = Depends(get_current_user)):
     """Get AI-generated summary of care logs"""
-    logs = await db.care_logs.find({'booking_id': booking_id}).sort('created_at', 1).to_list(200)
+    # Only the summary fields — a single photo dwarfs everything else here
+    logs = await db.care_logs.find(
+        {'booking_id': booking_id},
+        {'_id': 0, 'entry_type': 1, 'description': 1, 'medication_given': 1,
+         'meal_description': 1, 'vital_signs': 1}
+    ).sort('created_at', 1).to_list(200)
     
     if not logs:
         return {'summary': 'Nenhum registro de cuidado ainda.'}
@@ -2424,6 +2985,33 @@ async def get_care_log_summary(booking_id: str, user = Depends(get_current_user)
 
 # ============ DOCUMENT OCR VALIDATION ============
 
+# Simulated OCR results are literal constants; built once instead of per upload
+_VALIDATION_RESULTS = {
+    'cpf': {
+        'extracted_number': '***.***.***-**',  # Masked for security
+        'valid_format': True,
+        'confidence': 0.95
+    },
+    'rg': {
+        'extracted_number': '*******-*',
+        'valid_format': True,
+        'confidence': 0.92
+    },
+    'coren': {
+        'extracted_number': 'COREN-XX-******',
+        'valid_format': True,
+        'professional_type': 'Técnico de Enfermagem',
+        'confidence': 0.88
+    },
+    'certificate': {
+        'institution': 'Instituto de Cuidadores',
+        'course_name': 'Cuidador de Idosos',
+        'valid': True,
+        'confidence': 0.85
+    }
+}
+_INVALID_RESULT = {'valid_format': False, 'confidence': 0}
+
 @api_router.post("/documents/validate-ocr")
 async def validate_document_ocr(
     document_type: str,  # 'cpf', 'rg', 'coren', 'certificate'
@@ -2435,83 +3023,57 @@ async def validate_document_ocr(
     # In production, this would use an actual OCR service like Google Vision API
     # For now, we simulate the validation
     
-    doc_id = str(uuid.uuid4())
-    
-    # Store document
-    document = {
-        'id': doc_id,
-        'user_id': user['id'],
-        'document_type': document_type,
-        'document_base64': document_base64[:100] + '...',  # Store truncated for security
-        'status': 'pending',
-        'ocr_result': None,
-        'validation_result': None,
-        'created_at': datetime.utcnow()
-    }
-    await db.documents.insert_one(document)
-    
-    # Simulate OCR processing
-    validation_results = {
-        'cpf': {
-            'extracted_number': '***.***.***-**',  # Masked for security
-            'valid_format': True,
-            'confidence': 0.95
-        },
-        'rg': {
-            'extracted_number': '*******-*',
-            'valid_format': True,
-            'confidence': 0.92
-        },
-        'coren': {
-            'extracted_number': 'COREN-XX-******',
-            'valid_format': True,
-            'professional_type': 'Técnico de Enfermagem',
-            'confidence': 0.88
-        },
-        'certificate': {
-            'institution': 'Instituto de Cuidadores',
-            'course_name': 'Cuidador de Idosos',
-            'valid': True,
-            'confidence': 0.85
-        }
-    }
-    
-    result = validation_results.get(document_type, {'valid_format': False, 'confidence': 0})
-    
-    # Update document with OCR result
-    await db.documents.update_one(
-        {'id': doc_id},
-        {'$set': {
-            'status': 'validated' if result.get('valid_format', False) else 'invalid',
+    doc_id = new_id()
+
+    result = _VALIDATION_RESULTS.get(document_type, _INVALID_RESULT)
+    status = 'validated' if result.get('valid_format', False) else 'invalid'
+    now = datetime.utcnow()
+
+    # The raw payload lives in document_blobs as decoded bytes; the main
+    # document only carries metadata so listings stay small
+    try:
+        blob_data = Binary(base64.b64decode(document_base64))
+    except (ValueError, TypeError):
+        blob_data = Binary(document_base64.encode())
+
+    await asyncio.gather(
+        db.document_blobs.insert_one({'doc_id': doc_id, 'data': blob_data}),
+        db.documents.insert_one({
+            'id': doc_id,
+            'user_id': user['id'],
+            'document_type': document_type,
+            'blob_id': doc_id,
+            'size': len(document_base64),
+            'status': status,
             'ocr_result': result,
-            'validated_at': datetime.utcnow()
-        }}
+            'validation_result': None,
+            'created_at': now,
+            'validated_at': now
+        })
     )
-    
+
     return {
         'document_id': doc_id,
         'document_type': document_type,
         'validation_result': result,
-        'status': 'validated' if result.get('valid_format', False) else 'invalid'
+        'status': status
     }
 
 @api_router.get("/documents/user/{user_id}")
-async def get_user_documents(user_id: str, current_user = Depends(get_current_user)):
+async def get_user_documents(user_id: str, current_user = Depends(require_self_or_admin)):
     """Get all documents for a user"""
-    if current_user['id'] != user_id and current_user['role'] != 'admin':
-        raise HTTPException(status_code=403, detail='Access denied')
-    
-    documents = await db.documents.find({'user_id': user_id}).to_list(50)
-    
-    for doc in documents:
-        if '_id' in doc:
-            del doc['_id']
-        # Remove base64 data for security
-        if 'document_base64' in doc:
-            doc['has_image'] = True
-            del doc['document_base64']
-    
-    return documents
+    # New rows keep their payload in document_blobs; legacy rows may still
+    # embed document_base64, so keep it projected out of the response
+    cursor = db.documents.aggregate([
+        {'$match': {'user_id': user_id}},
+        {'$addFields': {'has_image': {'$or': [
+            {'$gt': ['$blob_id', None]},
+            {'$gt': ['$document_base64', None]}
+        ]}}},
+        {'$project': {'_id': 0, 'document_base64': 0}},
+        {'$limit': 50}
+    ], hint='user_id_1_created_at_-1').batch_size(20)
+    return [doc async for doc in cursor]
 
 # ============ SENIORCARE ACADEMY ============
 
@@ -2733,65 +3295,240 @@ O Alzheimer é uma doença neurodegenerativa que afeta a memória, pensamento e
     ]
 }
 
+# The catalog is static, so the content-stripped listing views are built
+# once at import time instead of per request
+_ARTICLES_NO_CONTENT = [
+    {k: v for k, v in a.items() if k != 'content'} for a in ACADEMY_CONTENT['articles']
+]
+_ARTICLES_BY_CATEGORY: Dict[str, list] = {}
+for _article in _ARTICLES_NO_CONTENT:
+    _ARTICLES_BY_CATEGORY.setdefault(_article['category'], []).append(_article)
+_ARTICLE_BY_ID = {a['id']: a for a in ACADEMY_CONTENT['articles']}
+# Full articles pre-serialized once; a read returns cached bytes
+_ARTICLE_JSON_BY_ID = {a['id']: orjson.dumps(a) for a in ACADEMY_CONTENT['articles']}
+TOTAL_ARTICLES = len(ACADEMY_CONTENT['articles'])
+_ACADEMY_CATEGORIES_BYTES = orjson.dumps(ACADEMY_CONTENT['categories'])
+_ACADEMY_COURSES_BYTES = orjson.dumps(ACADEMY_CONTENT['courses'])
+_ARTICLES_NO_CONTENT_BYTES = orjson.dumps(_ARTICLES_NO_CONTENT)
+_ARTICLES_BY_CATEGORY_BYTES = {
+    cat: orjson.dumps(arts) for cat, arts in _ARTICLES_BY_CATEGORY.items()
+}
+# ETags let repeat callers skip the body entirely with a 304
+_ACADEMY_CATEGORIES_ETAG = hashlib.md5(_ACADEMY_CATEGORIES_BYTES).hexdigest()
+_ACADEMY_COURSES_ETAG = hashlib.md5(_ACADEMY_COURSES_BYTES).hexdigest()
+_ARTICLES_NO_CONTENT_ETAG = hashlib.md5(_ARTICLES_NO_CONTENT_BYTES).hexdigest()
+_ARTICLES_BY_CATEGORY_ETAGS = {
+    cat: hashlib.md5(body).hexdigest() for cat, body in _ARTICLES_BY_CATEGORY_BYTES.items()
+}
+_EMPTY_LIST_BYTES = b'[]'
+_EMPTY_LIST_ETAG = hashlib.md5(_EMPTY_LIST_BYTES).hexdigest()
+
+# Reading-progress marks don't need to be durable before the article is
+# served; they are queued and a background worker bulk-upserts them
+_progress_queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+_progress_worker_task = None
+PROGRESS_BATCH_MAX = 100
+PROGRESS_FLUSH_SECONDS = 0.2
+
+async def _flush_progress_batch(batch: List[tuple]):
+    try:
+        await db.academy_progress.bulk_write([
+            UpdateOne(
+                {'user_id': user_id, 'article_id': article_id},
+                {'$set': {'read': True, 'read_at': read_at}},
+                upsert=True
+            )
+            for user_id, article_id, read_at in batch
+        ], ordered=False)
+    except Exception as e:
+        logger.error(f"Failed to flush progress batch: {e}")
+
+async def progress_worker():
+    """Drain the progress queue: flush when 100 marks accumulate or 200ms pass"""
+    while True:
+        batch = [await _progress_queue.get()]
+        while len(batch) < PROGRESS_BATCH_MAX:
+            try:
+                batch.append(await asyncio.wait_for(_progress_queue.get(), timeout=PROGRESS_FLUSH_SECONDS))
+            except asyncio.TimeoutError:
+                break
+        await _flush_progress_batch(batch)
+
 @api_router.get("/academy/categories")
-async def get_academy_categories():
+async def get_academy_categories(request: Request):
     """Get all academy categories"""
-    return ACADEMY_CONTENT['categories']
+    return static_json_response(request, _ACADEMY_CATEGORIES_BYTES, _ACADEMY_CATEGORIES_ETAG)
 
 @api_router.get("/academy/articles")
-async def get_academy_articles(category: Optional[str] = None):
+async def get_academy_articles(request: Request, category: Optional[str] = None):
     """Get academy articles, optionally filtered by category"""
-    articles = ACADEMY_CONTENT['articles']
     if category:
-        articles = [a for a in articles if a['category'] == category]
-    
-    # Return without full content for listing
-    return [{k: v for k, v in a.items() if k != 'content'} for a in articles]
+        body = _ARTICLES_BY_CATEGORY_BYTES.get(category, _EMPTY_LIST_BYTES)
+        etag = _ARTICLES_BY_CATEGORY_ETAGS.get(category, _EMPTY_LIST_ETAG)
+    else:
+        body, etag = _ARTICLES_NO_CONTENT_BYTES, _ARTICLES_NO_CONTENT_ETAG
+    return static_json_response(request, body, etag)
 
 @api_router.get("/academy/articles/{article_id}")
 async def get_academy_article(article_id: str, user = Depends(get_current_user)):
     """Get full article content"""
-    for article in ACADEMY_CONTENT['articles']:
-        if article['id'] == article_id:
-            # Track reading progress
-            await db.academy_progress.update_one(
-                {'user_id': user['id'], 'article_id': article_id},
-                {'$set': {'read': True, 'read_at': datetime.utcnow()}},
-                upsert=True
-            )
-            return article
-    raise HTTPException(status_code=404, detail='Article not found')
+    body = _ARTICLE_JSON_BY_ID.get(article_id)
+    if not body:
+        raise HTTPException(status_code=404, detail='Article not found')
+
+    # Track reading progress off the response path; losing one mark when
+    # the queue is full or on a crash is harmless
+    try:
+        _progress_queue.put_nowait((user['id'], article_id, datetime.utcnow()))
+    except asyncio.QueueFull:
+        pass
+    return Response(body, media_type='application/json')
 
 @api_router.get("/academy/courses")
-async def get_academy_courses():
+async def get_academy_courses(request: Request):
     """Get all available courses"""
-    return ACADEMY_CONTENT['courses']
+    return static_json_response(request, _ACADEMY_COURSES_BYTES, _ACADEMY_COURSES_ETAG)
 
 @api_router.get("/academy/progress")
 async def get_user_academy_progress(user = Depends(get_current_user)):
     """Get user's academy progress"""
-    progress = await db.academy_progress.find({'user_id': user['id']}).to_list(100)
-    
-    articles_read = [p['article_id'] for p in progress if p.get('read')]
-    
+    # One small document back: the read ids and their count
+    result = await db.academy_progress.aggregate([
+        {'$match': {'user_id': user['id'], 'read': True}},
+        {'$group': {'_id': None, 'ids': {'$push': '$article_id'}, 'count': {'$sum': 1}}}
+    ], hint='user_article_uniq').to_list(1)
+    count = result[0]['count'] if result else 0
+
     return {
-        'articles_read': len(articles_read),
-        'total_articles': len(ACADEMY_CONTENT['articles']),
-        'progress_percent': int(len(articles_read) / len(ACADEMY_CONTENT['articles']) * 100),
-        'read_articles': articles_read
+        'articles_read': count,
+        'total_articles': TOTAL_ARTICLES,
+        'progress_percent': count * 100 // TOTAL_ARTICLES if TOTAL_ARTICLES else 0,
+        'read_articles': result[0]['ids'] if result else []
     }
 
 # Include router and configure CORS
 app.include_router(api_router)
 
+# Exact-match origins take CORSMiddleware's fast path; '*' with
+# credentials forces per-request header computation
+CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["authorization", "content-type"],
 )
 
+# Booking-status notifications come from a change stream so the write path
+# does one insert less. Falls back to inline notification when the stream
+# is unavailable (standalone mongod has no oplog).
+booking_stream_active = False
+_booking_notifier_task = None
+
+async def booking_notifier():
+    """Consume booking status changes and emit the notifications once"""
+    global booking_stream_active
+    pipeline = [{'$match': {
+        'operationType': 'update',
+        'updateDescription.updatedFields.status': {'$in': ['confirmed', 'completed']}
+    }}]
+    try:
+        async with db.bookings.watch(pipeline, full_document='updateLookup') as stream:
+            booking_stream_active = True
+            async for change in stream:
+                booking = change['fullDocument']
+                if not booking:
+                    continue
+                if booking['status'] == 'confirmed':
+                    await create_notification(
+                        booking['client_id'],
+                        'Agendamento confirmado!',
+                        f'{booking["caregiver_name"]} aceitou cuidar de {booking["elder_name"]}',
+                        'booking_confirmed',
+                        {'booking_id': booking['id']}
+                    )
+                elif booking['status'] == 'completed':
+                    await create_notification(
+                        booking['client_id'],
+                        'Cuidado finalizado',
+                        f'O atendimento de {booking["elder_name"]} foi concluído',
+                        'booking_completed',
+                        {'booking_id': booking['id']}
+                    )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        booking_stream_active = False
+        logger.warning(f"Booking change stream unavailable, notifying inline: {e}")
+
+@app.on_event("startup")
+async def start_booking_notifier():
+    global _booking_notifier_task, _push_worker_task, _progress_worker_task
+    _booking_notifier_task = asyncio.create_task(booking_notifier())
+    _push_worker_task = asyncio.create_task(push_worker())
+    _progress_worker_task = asyncio.create_task(progress_worker())
+
+@app.on_event("startup")
+async def create_indexes():
+    """Create the indexes backing the hot query paths"""
+    await db.users.create_index('id', unique=True)
+    await db.users.create_index('email', unique=True)
+    await db.caregiver_profiles.create_index('id', unique=True)
+    await db.caregiver_profiles.create_index('user_id', unique=True)
+    await db.caregiver_profiles.create_index(
+        [('city', 1), ('available', 1), ('verified', 1), ('rating', -1)])
+    # Multikey index for the specialization $in filter; rating backs min_rating
+    await db.caregiver_profiles.create_index('specializations')
+    await db.caregiver_profiles.create_index([('rating', -1)])
+    await db.client_profiles.create_index('user_id', unique=True)
+    await db.bookings.create_index('id', unique=True)
+    await db.bookings.create_index([('client_id', 1), ('created_at', -1)])
+    await db.bookings.create_index([('caregiver_id', 1), ('created_at', -1)])
+    await db.bookings.create_index([('caregiver_id', 1), ('status', 1), ('created_at', -1)])
+    # Admin listings paginate on recency
+    await db.users.create_index([('created_at', -1)])
+    await db.bookings.create_index([('created_at', -1)])
+    # Status-filtered admin listing and the paid financial report
+    await db.bookings.create_index([('status', 1), ('created_at', -1)])
+    await db.bookings.create_index([('paid', 1), ('created_at', -1)])
+    # Pending-caregivers queue
+    await db.caregiver_profiles.create_index([('background_check_status', 1), ('verified', 1)])
+    # Active-token fetch in the push fan-out
+    await db.push_tokens.create_index([('user_id', 1), ('active', 1)])
+    await db.documents.create_index([('user_id', 1), ('created_at', -1)])
+    await db.document_blobs.create_index('doc_id')
+    # Unique pair also turns the read-progress upsert into a key probe
+    await db.academy_progress.create_index([('user_id', 1), ('article_id', 1)], unique=True, name='user_article_uniq')
+    await db.academy_progress.create_index('article_id')
+    await db.notifications.create_index([('user_id', 1), ('read', 1), ('created_at', -1)])
+    await db.care_logs.create_index([('booking_id', 1), ('created_at', -1)])
+    await db.chat_messages.create_index([('sender_id', 1), ('recipient_id', 1), ('created_at', 1)])
+    # Second ordering covers the other branch of the chat-history $or
+    await db.chat_messages.create_index([('recipient_id', 1), ('sender_id', 1), ('created_at', 1)])
+    await db.chat_messages.create_index('booking_id')
+    # Serves the per-room unread-count $lookup in get_chat_rooms
+    await db.chat_messages.create_index([('room_id', 1), ('sender_id', 1), ('read', 1)])
+    # Multikey index for room membership, covering the sort too
+    await db.chat_rooms.create_index([('participants', 1), ('last_message_at', -1)])
+    # Cursor pagination over room history
+    await db.chat_messages.create_index([('room_id', 1), ('created_at', -1)])
+    await db.reviews.create_index([('caregiver_id', 1), ('created_at', -1)])
+    await db.family_shares.create_index('booking_id')
+    await db.verifications.create_index('caregiver_id')
+    await db.verifications.create_index('status')
+    # Dedupes registrations server-side; the upsert is one index seek
+    await db.push_tokens.create_index([('user_id', 1), ('push_token', 1)], unique=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if _booking_notifier_task:
+        _booking_notifier_task.cancel()
+    if _push_worker_task:
+        _push_worker_task.cancel()
+    if _progress_worker_task:
+        _progress_worker_task.cancel()
     client.close()
+    await redis_client.close()
+    await http_client.aclose()